@@ -0,0 +1,348 @@
+"""
+Drives every route in tasks/urls.py and users/urls.py with concurrent clients
+and reports p50/p95/p99 latency, throughput and queries per request.
+
+    python -m benchmarks.api --users 1000 --tasks 10000 --assignments 100000 \\
+        --concurrency 8 --iterations 50 --output api.json
+    python -m benchmarks.api --skip-seed --concurrency 8 --iterations 50 --baseline api.json
+
+Requests go through Django's WSGI handler in-process, so the suite runs
+offline against whatever database the settings point at; use a scratch
+database, it is seeded like benchmarks.indexes unless --skip-seed is given.
+Each client signs in as its own seeded user and repeats one scenario that
+creates a task, assigns it to itself, moves it through its statuses and
+deletes it, interleaved with the read endpoints. With --baseline, routes
+whose p95 latency grew by more than --tolerance or that now run more
+queries are reported and the exit status is 1.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_manager_josh.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from benchmarks.load import summarize
+from benchmarks.seed import BENCHMARK_PASSWORD, seed
+from tasks import urls as task_urls
+from tasks.exports import run_export
+from tasks.models import Export, Task
+from users import urls as user_urls
+from users.tokens import add_user_claims
+
+BATCH_SIZE = 10
+PAGE = '?page_size=50'
+
+
+def _task_id(response):
+    return response['data']['id']
+
+
+def _export_written(ctx, response):
+    # Stands in for run_export_worker so the status and download steps find a file.
+    ctx.update(export_id=response['data']['id'])
+    run_export(Export.objects.get(id=ctx['export_id']))
+
+
+def request_kwargs(body):
+    # A (content type, payload) body is sent as is; anything else as JSON.
+    if isinstance(body, tuple):
+        return {'data': body[1], 'content_type': body[0]}
+    return {'data': json.dumps(body), 'content_type': 'application/json'}
+
+
+def _import_rows(ctx):
+    return '\n'.join(json.dumps({
+        'name': f"Load import {ctx['worker']}-{ctx['iteration']}-{i}", 'description': 'Imported by the load suite',
+        'assignees': [ctx['email']], 'status': 'open',
+    }) for i in range(BATCH_SIZE))
+
+
+# (label, url name, request builder, callback) in scenario order. A builder
+# gets the client's context and returns (method, path, body), where body is
+# JSON data or a (content type, payload) tuple; a callback stores what later
+# steps need from the parsed response.
+SCENARIO = (
+    ('signin', 'signin', lambda ctx: ('POST', reverse('signin'), {'email': ctx['email'], 'password': BENCHMARK_PASSWORD}),
+     lambda ctx, response: ctx.update(refresh=response['data']['refresh'])),
+    ('token_refresh', 'token_refresh', lambda ctx: ('POST', reverse('token_refresh'), {'refresh_token': ctx['refresh']}), None),
+    ('signup', 'signup', lambda ctx: ('POST', reverse('signup'), {
+        'email': f"load-{ctx['run']}-{ctx['worker']}-{ctx['iteration']}@example.com",
+        'password': BENCHMARK_PASSWORD, 'name': 'Load Test',
+    }), None),
+    ('fetch_users', 'fetch_users', lambda ctx: ('GET', reverse('fetch_users') + PAGE + '&fields=id,email,name', None), None),
+    ('fetch_users_async', 'fetch_users_async',
+     lambda ctx: ('GET', reverse('fetch_users_async') + PAGE + '&fields=id,email,name', None), None),
+    # Without fields= the default field set prefetches permissions and tasks.
+    ('fetch_users_all', 'fetch_users', lambda ctx: ('GET', reverse('fetch_users') + PAGE, None), None),
+    ('fetch_users_async_all', 'fetch_users_async', lambda ctx: ('GET', reverse('fetch_users_async') + PAGE, None), None),
+    ('add_permission', 'add_permission_to_user', lambda ctx: ('POST', reverse(
+        'add_permission_to_user', args=[ctx['target_user_id'], 'create_task']), None), None),
+    ('remove_permission', 'remove_permission_from_user', lambda ctx: ('POST', reverse(
+        'remove_permission_from_user', args=[ctx['target_user_id'], 'create_task']), None), None),
+    ('task_create', 'task-create', lambda ctx: ('POST', reverse('task-create'), {
+        'name': f"Load task {ctx['worker']}-{ctx['iteration']}", 'description': 'Created by the load suite',
+    }), lambda ctx, response: ctx.update(task_id=_task_id(response))),
+    ('task_create_batch', 'task-create-batch', lambda ctx: ('POST', reverse('task-create-batch'), {
+        'tasks': [{'name': f"Load batch {ctx['worker']}-{ctx['iteration']}-{i}", 'description': 'Batch'} for i in range(BATCH_SIZE)],
+    }), None),
+    ('task_import', 'task-import', lambda ctx: ('POST', reverse('task-import'), ('application/x-ndjson', _import_rows(ctx))),
+     None),
+    ('task_assign', 'task-assign', lambda ctx: ('POST', reverse('task-assign') + f"?task_id={ctx['task_id']}", {
+        'user_ids': [ctx['user_id']],
+    }), None),
+    ('task_status', 'update-user-task-status-by-id', lambda ctx: (
+        'PUT', reverse('update-user-task-status-by-id') + f"?task_id={ctx['task_id']}", {'status': 'in_progress'}), None),
+    ('task_status_bulk', 'bulk-update-user-task-status', lambda ctx: ('PUT', reverse('bulk-update-user-task-status'), {
+        'updates': [{'task_id': ctx['task_id'], 'status': 'completed'}],
+    }), None),
+    ('task_update', 'task-update', lambda ctx: ('PUT', reverse('task-update') + f"?id={ctx['task_id']}", {
+        'name': f"Load task {ctx['worker']}-{ctx['iteration']} (updated)", 'description': 'Updated by the load suite',
+    }), None),
+    ('user_tasks', 'user-tasks', lambda ctx: ('GET', reverse('user-tasks') + PAGE, None), None),
+    ('user_tasks_async', 'user-tasks-async', lambda ctx: ('GET', reverse('user-tasks-async') + PAGE, None), None),
+    ('user_tasks_uid', 'user-tasks', lambda ctx: ('GET', reverse('user-tasks') + PAGE + f"&user_id={ctx['target_user_id']}", None),
+     None),
+    ('user_tasks_async_uid', 'user-tasks-async',
+     lambda ctx: ('GET', reverse('user-tasks-async') + PAGE + f"&user_id={ctx['target_user_id']}", None), None),
+    ('task_fetch', 'task-fetch', lambda ctx: ('GET', reverse('task-fetch') + PAGE, None), None),
+    ('task_fetch_one', 'task-fetch', lambda ctx: ('GET', reverse('task-fetch') + f"?id={ctx['seeded_task_id']}", None), None),
+    ('task_fetch_async', 'task-fetch-async', lambda ctx: ('GET', reverse('task-fetch-async') + PAGE, None), None),
+    ('task_fetch_async_one', 'task-fetch-async',
+     lambda ctx: ('GET', reverse('task-fetch-async') + f"?id={ctx['seeded_task_id']}", None), None),
+    ('task_search', 'task-search', lambda ctx: ('GET', reverse('task-search') + PAGE + '&q=benchmark task', None), None),
+    ('task_delete', 'task-delete', lambda ctx: ('DELETE', reverse('task-delete') + f"?id={ctx['task_id']}", None), None),
+    ('export_create', 'export-create', lambda ctx: ('POST', reverse('export-create'), {
+        'kind': 'user_tasks', 'format': 'ndjson', 'filters': {'user_id': ctx['user_id']},
+    }), _export_written),
+    ('export_status', 'export-status', lambda ctx: ('GET', reverse('export-status') + f"?id={ctx['export_id']}", None), None),
+    ('export_download', 'export-download',
+     lambda ctx: ('GET', reverse('export-download') + f"?id={ctx['export_id']}", None), None),
+)
+
+
+def uncovered_routes():
+    names = {pattern.name for pattern in [*task_urls.urlpatterns, *user_urls.urlpatterns]}
+    return sorted(names - {url_name for _, url_name, _, _ in SCENARIO})
+
+
+class QueryCounter:
+    """execute_wrapper counting the queries and database time of one thread."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - start) * 1000
+
+
+def run(contexts, iterations, warmup):
+    handler = WSGIHandler()
+    factory = RequestFactory()
+    samples = {label: [] for label, _, _, _ in SCENARIO}
+    errors = {label: [] for label in samples}
+    lock = threading.Lock()
+
+    def request(method, path, body, token):
+        kwargs = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        if body is not None:
+            kwargs.update(request_kwargs(body))
+        response = handler(factory.generic(method, path, **kwargs).environ, lambda status, headers: None)
+        content = b''.join(response)
+        response.close()
+        return response.status_code, content
+
+    def worker(ctx):
+        counter = QueryCounter()
+        local = {label: [] for label in samples}
+        local_errors = {label: [] for label in samples}
+        with contextlib.ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            for iteration in range(warmup + iterations):
+                ctx['iteration'] = iteration
+                for label, _, build, callback in SCENARIO:
+                    method, path, body = build(ctx)
+                    queries, db_ms = counter.queries, counter.db_ms
+                    start = time.perf_counter()
+                    status, content = request(method, path, body, ctx['token'])
+                    sample = ((time.perf_counter() - start) * 1000, counter.queries - queries, counter.db_ms - db_ms)
+                    if status >= 400:
+                        local_errors[label].append(f"{status} {' '.join(content.decode(errors='replace').split())[:200]}")
+                    elif callback:
+                        callback(ctx, json.loads(content))
+                    if iteration >= warmup:
+                        local[label].append(sample)
+        connections.close_all()
+        with lock:
+            for label in samples:
+                samples[label].extend(local[label])
+                errors[label].extend(local_errors[label])
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(ctx,)) for ctx in contexts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    routes = {}
+    for label, values in samples.items():
+        count = len(values) or 1
+        routes[label] = {
+            **summarize([v[0] for v in values], 0, elapsed),
+            'errors': len(errors[label]),
+            'queries_per_request': round(sum(v[1] for v in values) / count, 2),
+            'max_queries': max((v[1] for v in values), default=0),
+            'db_ms_per_request': round(sum(v[2] for v in values) / count, 3),
+        }
+        if errors[label]:
+            routes[label]['first_error'] = errors[label][0]
+    all_values = [v for values in samples.values() for v in values]
+    overall = {
+        **summarize([v[0] for v in all_values], 0, elapsed),
+        'errors': sum(len(e) for e in errors.values()),
+        'queries_per_request': round(sum(v[1] for v in all_values) / (len(all_values) or 1), 2),
+    }
+    return overall, routes
+
+
+def build_contexts(concurrency):
+    User = get_user_model()
+    user_ids = list(User.objects.filter(email__startswith='bench').order_by('id').values_list('id', 'email'))
+    if len(user_ids) < 2 * concurrency:
+        raise SystemExit(f"Need at least {2 * concurrency} seeded users for --concurrency {concurrency}")
+    seeded_task_id = Task.objects.filter(is_active=True).order_by('id').values_list('id', flat=True).first()
+    run_id = uuid.uuid4().hex[:8]
+    contexts = []
+    for worker in range(concurrency):
+        user = User.objects.get(id=user_ids[worker][0])
+        target = User.objects.get(id=user_ids[concurrency + worker][0])
+        # The add/remove permission steps start from a target without it.
+        target.custom_permissions.remove(*target.custom_permissions.filter(codename='create_task'))
+        contexts.append({
+            'run': run_id,
+            'worker': worker,
+            'user_id': user.id,
+            'email': user.email,
+            'token': str(add_user_claims(RefreshToken.for_user(user), user).access_token),
+            'target_user_id': target.id,
+            'seeded_task_id': seeded_task_id,
+        })
+    return contexts
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, routes, tolerance):
+    regressions = []
+    print(f"\n{'route':<22}{'p95 ms':>10}{'baseline':>10}{'change':>9}{'queries':>9}{'baseline':>10}")
+    for label, result in routes.items():
+        before = baseline['routes'].get(label)
+        if not before or not before['p95_ms'] or result['p95_ms'] is None:
+            continue
+        change = result['p95_ms'] / before['p95_ms'] - 1
+        flag = ''
+        if change > tolerance or result['queries_per_request'] > before['queries_per_request']:
+            regressions.append(label)
+            flag = '  <-- regression'
+        print(f"{label:<22}{result['p95_ms']:>10}{before['p95_ms']:>10}{change:>+9.0%}"
+              f"{result['queries_per_request']:>9}{before['queries_per_request']:>10}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tasks', type=int, default=10000)
+    parser.add_argument('--assignments', type=int, default=100000)
+    parser.add_argument('--permission-share', type=float, default=1.0,
+                        help='share of seeded users holding the custom permissions')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-seed', action='store_true')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--iterations', type=int, default=20, help='scenario runs per client')
+    parser.add_argument('--warmup', type=int, default=1, help='unrecorded scenario runs per client')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='results JSON of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95 growth against --baseline')
+    args = parser.parse_args(argv)
+
+    missing = uncovered_routes()
+    if missing:
+        print(f"Warning: routes not covered by the scenario: {', '.join(missing)}")
+    if not args.skip_seed:
+        seed(args.users, args.tasks, args.assignments, args.seed, stdout=sys.stdout,
+             permission_share=args.permission_share)
+    contexts = build_contexts(args.concurrency)
+    connections.close_all()
+
+    print(f"Running {args.concurrency} clients x {args.iterations} iterations ...")
+    overall, routes = run(contexts, args.iterations, args.warmup)
+
+    print(f"\n{'route':<22}{'rps':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'db ms':>9}{'errors':>8}")
+    for label, result in [*routes.items(), ('overall', overall)]:
+        print(f"{label:<22}{result['throughput_rps']:>8}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}"
+              f"{result['queries_per_request']:>9}{result.get('db_ms_per_request', ''):>9}{result['errors']:>8}")
+    for label, result in routes.items():
+        if 'first_error' in result:
+            print(f"{label}: {result['errors']} errors, first: {result['first_error']}")
+
+    results = {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'vendor': connections[DEFAULT_DB_ALIAS].vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'dataset': {'users': args.users, 'tasks': args.tasks, 'assignments': args.assignments,
+                        'permission_share': args.permission_share, 'seed': args.seed, 'seeded': not args.skip_seed},
+            'concurrency': args.concurrency,
+            'iterations': args.iterations,
+        },
+        'overall': overall,
+        'routes': routes,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), routes, args.tolerance)
+        if regressions:
+            print(f"\nRegressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Load-tests the sync read endpoints served over WSGI against their async
+counterparts (tasks/async_views.py, users/async_views.py) served over ASGI.
+
+Start both servers on the same database, e.g.
+
+    gunicorn task_manager_josh.wsgi -w 4 -b 127.0.0.1:8001
+    uvicorn task_manager_josh.asgi:application --workers 4 --port 8002
+
+then run
+
+    python -m benchmarks.asgi_vs_wsgi --wsgi-url http://127.0.0.1:8001 --asgi-url http://127.0.0.1:8002 \
+        --concurrency 50 --duration 30 --output asgi_vs_wsgi.json
+
+gunicorn and uvicorn are not in requirements.txt; install them for the run.
+The database is seeded like benchmarks.indexes unless --skip-seed is given.
+"""
+import argparse
+import json
+import os
+import sys
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_manager_josh.settings')
+django.setup()
+
+from django.db.models import Count
+
+from benchmarks.load import run_load, sign_in
+from benchmarks.seed import seed
+from tasks.models import Task, UserTask
+
+# (sync path on WSGI, async path on ASGI); {task_id} is filled in at start-up.
+ROUTES = (
+    ('/api/tasks/fetch/', '/api/tasks/async/fetch/'),
+    ('/api/tasks/fetch/?id={task_id}', '/api/tasks/async/fetch/?id={task_id}'),
+    ('/api/tasks/user-tasks/', '/api/tasks/async/user-tasks/'),
+    ('/api/tasks/user-tasks/?status=open,in_progress', '/api/tasks/async/user-tasks/?status=open,in_progress'),
+    ('/api/users/fetch-users/?fields=id,email,name', '/api/users/async/fetch-users/?fields=id,email,name'),
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--wsgi-url', required=True)
+    parser.add_argument('--asgi-url', required=True)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tasks', type=int, default=10000)
+    parser.add_argument('--assignments', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-seed', action='store_true')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds per server')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    if not args.skip_seed:
+        seed(args.users, args.tasks, args.assignments, args.seed, stdout=sys.stdout)
+    # Load the busiest user so UserTasks returns full pages.
+    busiest = UserTask.objects.values('user__email').annotate(n=Count('id')).order_by('-n')[0]['user__email']
+    task_id = Task.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)[0]
+
+    results = {}
+    for name, url, column in (('wsgi', args.wsgi_url, 0), ('asgi', args.asgi_url, 1)):
+        token = sign_in(url, busiest)
+        requests = [('GET', route[column].format(task_id=task_id), None) for route in ROUTES]
+        print(f"Running {name} against {url} for {args.duration:.0f}s ...")
+        results[name] = run_load(url, token, requests, concurrency=args.concurrency, duration=args.duration)
+
+    print(f"\n{'':<10}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, result in results.items():
+        overall = result['overall']
+        print(f"{name:<10}{overall['throughput_rps']:>10}{overall['p50_ms']:>10}{overall['p95_ms']:>10}"
+              f"{overall['p99_ms']:>10}{overall['errors']:>8}")
+    for sync_path, async_path in ROUTES:
+        wsgi = results['wsgi']['routes'][f"GET {sync_path.format(task_id=task_id)}"]
+        asgi = results['asgi']['routes'][f"GET {async_path.format(task_id=task_id)}"]
+        print(f"\n{sync_path.format(task_id=task_id)}\n  wsgi p50 {wsgi['p50_ms']} p95 {wsgi['p95_ms']} p99 {wsgi['p99_ms']}"
+              f"\n  asgi p50 {asgi['p50_ms']} p95 {asgi['p95_ms']} p99 {asgi['p99_ms']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'concurrency': args.concurrency,
+                'duration': args.duration,
+                **results,
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Measures per-request latency with each database connection mode: a new
+connection per request (CONN_MAX_AGE=0), persistent connections with health
+checks, and the psycopg connection pool.
+
+    python -m benchmarks.connections --threads 8 --requests 2000 --output connections.json
+
+Requests go through Django's WSGI handler in-process, so connections are
+opened and closed exactly as under a threaded WSGI server, without network
+noise. The pool mode needs PostgreSQL with psycopg 3 and psycopg-pool and is
+skipped otherwise. The database is seeded like benchmarks.indexes unless
+--skip-seed is given.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_manager_josh.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from benchmarks.load import summarize
+from benchmarks.seed import seed
+from task_manager_josh.db_connections import get_connection_stats
+from users.tokens import add_user_claims
+
+PATHS = ('/api/tasks/fetch/?page_size=20', '/api/tasks/user-tasks/?page_size=20')
+
+
+def pool_available():
+    if connections[DEFAULT_DB_ALIAS].vendor != 'postgresql':
+        return False
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def configure(mode, pool_size):
+    settings_dict = connections.settings[DEFAULT_DB_ALIAS]
+    settings_dict['OPTIONS'] = {k: v for k, v in settings_dict['OPTIONS'].items() if k != 'pool'}
+    settings_dict['CONN_MAX_AGE'] = 600 if mode == 'persistent' else 0
+    settings_dict['CONN_HEALTH_CHECKS'] = mode != 'per_request'
+    if mode == 'pool':
+        settings_dict['OPTIONS']['pool'] = {'min_size': pool_size, 'max_size': pool_size, 'timeout': 30}
+
+
+def run(mode, token, threads, requests, pool_size):
+    configure(mode, pool_size)
+    handler = WSGIHandler()
+    factory = RequestFactory()
+    timings, errors = [], [0]
+    lock = threading.Lock()
+    before = get_connection_stats()[DEFAULT_DB_ALIAS]['connects']
+
+    def worker(count):
+        local = []
+        for i in range(count):
+            environ = factory.get(PATHS[i % len(PATHS)], HTTP_AUTHORIZATION=f'Bearer {token}').environ
+            start = time.perf_counter()
+            # request_started/request_finished open and release the connection
+            # as a WSGI server would.
+            response = handler(environ, lambda status, headers: None)
+            response.close()
+            local.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                with lock:
+                    errors[0] += 1
+        connections.close_all()
+        with lock:
+            timings.extend(local)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(requests // threads,)) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stats = get_connection_stats()[DEFAULT_DB_ALIAS]
+    result = {**summarize(timings, 0, elapsed), 'non_200': errors[0], 'connects': stats['connects'] - before}
+    if mode == 'pool':
+        result['pool'] = stats['pool']
+        connections[DEFAULT_DB_ALIAS].close_pool()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tasks', type=int, default=10000)
+    parser.add_argument('--assignments', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-seed', action='store_true')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000, help='requests per mode')
+    parser.add_argument('--pool-size', type=int, default=4, help='pool size; below --threads to show waits')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    if not args.skip_seed:
+        seed(args.users, args.tasks, args.assignments, args.seed, stdout=sys.stdout)
+    user = get_user_model().objects.order_by('id').first()
+    token = str(add_user_claims(RefreshToken.for_user(user), user).access_token)
+    connections.close_all()
+
+    modes = ['per_request', 'persistent'] + (['pool'] if pool_available() else [])
+    results = {}
+    for mode in modes:
+        print(f"Running {mode} ...")
+        results[mode] = run(mode, token, args.threads, args.requests, args.pool_size)
+
+    print(f"\n{'mode':<14}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'connects':>10}")
+    for mode, result in results.items():
+        print(f"{mode:<14}{result['throughput_rps']:>10}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+              f"{result['p99_ms']:>10}{result['connects']:>10}")
+    if 'pool' in results:
+        print(f"\npool: {json.dumps(results['pool']['pool'])}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'vendor': connections[DEFAULT_DB_ALIAS].vendor, 'threads': args.threads, **results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Compares the plans and latency of the hot queries in tasks/views.py with and
+without the access-pattern indexes on Task and UserTask.
+
+    python -m benchmarks.indexes --users 10000 --tasks 100000 --assignments 1000000 --output indexes.json
+
+Point DB_NAME & co. at a scratch database: the script seeds it when it is
+empty and refuses to seed a populated one (use --skip-seed to reuse data
+seeded by an earlier run).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_manager_josh.settings')
+django.setup()
+
+from django.db import connection
+from django.db.models import Count
+
+from benchmarks.seed import seed
+from task_manager_josh.pagination import _keyset_filter
+from tasks.models import Task, UserTask
+
+BENCHMARKED_INDEXES = {
+    Task: ('task_active_created_idx',),
+    UserTask: (
+        'usertask_user_assigned_idx',
+        'usertask_user_open_idx',
+        'usertask_user_status_idx',
+        'usertask_task_status_idx',
+    ),
+}
+
+
+def build_queries():
+    # The busiest user and task make the worst case for each lookup.
+    user_id = UserTask.objects.values('user_id').annotate(n=Count('id')).order_by('-n')[0]['user_id']
+    task_id = UserTask.objects.filter(status__in=['open', 'in_progress']).values('task_id') \
+        .annotate(n=Count('id')).order_by('-n')[0]['task_id']
+    active = Task.objects.filter(is_active=True).order_by('created_at', 'id')
+    middle = active.values_list('created_at', 'id')[active.count() // 2]
+    assignees = list(UserTask.objects.filter(task_id=task_id).values_list('user_id', flat=True)[:500])
+
+    return {
+        # FetchAllTasks, first page and a page from the middle of the list
+        'task_list_first_page': active[:50],
+        'task_list_deep_page': active.filter(_keyset_filter(('created_at', 'id'), middle))[:50],
+        # UserTasks, the full inbox and the open work clients poll for
+        'user_inbox': UserTask.objects.filter(user_id=user_id).select_related('task')
+            .order_by('assigned_at', 'id')[:50],
+        'user_inbox_open': UserTask.objects.filter(user_id=user_id, status__in=['open', 'in_progress'])
+            .select_related('task').order_by('assigned_at', 'id')[:50],
+        'user_inbox_blocked': UserTask.objects.filter(user_id=user_id, status='blocked'),
+        # DeleteTask pending-assignment check
+        'task_pending_assignments': UserTask.objects.filter(task_id=task_id, status__in=['open', 'in_progress'])[:1],
+        # AssignTask conflict check for a 500-person team
+        'assign_conflict_check': UserTask.objects.filter(user_id__in=assignees, task_id__in=[task_id])
+            .exclude(status='completed').values_list('user__email', flat=True)[:1],
+        # UpdateUserTaskStatus lookup by (user, task)
+        'status_lookup': UserTask.objects.filter(user_id=user_id, task_id=task_id).values_list('status', flat=True),
+    }
+
+
+def explain(queryset):
+    if connection.vendor == 'postgresql':
+        return queryset.explain(analyze=True, buffers=True)
+    return queryset.explain()
+
+
+def measure(queries, repeat):
+    results = {}
+    for name, queryset in queries.items():
+        list(queryset.all())  # warm the cache so both runs start equal
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        results[name] = {
+            'median_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+            'plan': explain(queryset),
+        }
+    return results
+
+
+def analyze_tables():
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Task._meta.db_table}, {UserTask._meta.db_table}')
+
+
+def set_indexes(enabled):
+    with connection.schema_editor() as editor:
+        for model, names in BENCHMARKED_INDEXES.items():
+            for index in model._meta.indexes:
+                if index.name in names:
+                    (editor.add_index if enabled else editor.remove_index)(model, index)
+    analyze_tables()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--assignments', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--skip-seed', action='store_true')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    if not args.skip_seed:
+        seed(args.users, args.tasks, args.assignments, args.seed, stdout=sys.stdout)
+    analyze_tables()
+    queries = build_queries()
+
+    set_indexes(False)
+    try:
+        before = measure(queries, args.repeat)
+    finally:
+        set_indexes(True)
+    after = measure(queries, args.repeat)
+
+    print(f"{'query':<28}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name in queries:
+        speedup = before[name]['median_ms'] / after[name]['median_ms'] if after[name]['median_ms'] else float('inf')
+        print(f"{name:<28}{before[name]['median_ms']:>12.3f}{after[name]['median_ms']:>12.3f}{speedup:>9.1f}x")
+    for name in queries:
+        print(f"\n== {name} ==\n-- before --\n{before[name]['plan']}\n-- after --\n{after[name]['plan']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'vendor': connection.vendor,
+                'rows': {'users': args.users, 'tasks': args.tasks, 'assignments': args.assignments},
+                'before': before,
+                'after': after,
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Small HTTP load driver shared by the benchmark scripts. It only needs the
+standard library and talks to a running server, so it can be pointed at any
+deployment (runserver, gunicorn, uvicorn, ...).
+"""
+import http.client
+import json
+import threading
+import time
+import urllib.parse
+
+from benchmarks.seed import BENCHMARK_PASSWORD
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))], 3)
+
+
+def summarize(timings, errors, elapsed):
+    timings = sorted(timings)
+    return {
+        'requests': len(timings) + errors,
+        'errors': errors,
+        'throughput_rps': round((len(timings) + errors) / elapsed, 1) if elapsed else None,
+        'p50_ms': percentile(timings, 0.50),
+        'p95_ms': percentile(timings, 0.95),
+        'p99_ms': percentile(timings, 0.99),
+    }
+
+
+class Client:
+    """One keep-alive connection; every worker thread owns its own."""
+
+    def __init__(self, base_url, token=None, timeout=30):
+        url = urllib.parse.urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(url.netloc, timeout=timeout)
+        self.prefix = url.path.rstrip('/')
+        self.token = token
+
+    def request(self, method, path, body=None, headers=None):
+        headers = {'Accept': 'application/json', **(headers or {})}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            return response.status, response.read(), dict(response.getheaders())
+        except (http.client.HTTPException, OSError):
+            # Reconnect on the next request instead of failing the worker.
+            self.connection.close()
+            raise
+
+    def close(self):
+        self.connection.close()
+
+
+def sign_in(base_url, email, password=BENCHMARK_PASSWORD):
+    client = Client(base_url)
+    try:
+        status, body, _ = client.request('POST', '/api/users/signin/', {'email': email, 'password': password})
+    finally:
+        client.close()
+    if status != 200:
+        raise RuntimeError(f"Signing in as {email} failed with {status}: {body[:200]!r}")
+    return json.loads(body)['data']['access']
+
+
+def run_load(base_url, token, requests, concurrency=10, duration=10.0, ok_statuses=(200, 201, 204, 207, 304)):
+    """
+    Sends ``requests`` from ``concurrency`` threads for ``duration`` seconds.
+    Each worker cycles through ``requests`` (a list of ``(method, path,
+    body)``) starting at its own offset so all routes are hit concurrently.
+    Returns ``summarize()`` output overall and per ``"METHOD path"``.
+    """
+    timings = {f'{method} {path}': [] for method, path, _ in requests}
+    errors = dict.fromkeys(timings, 0)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(offset):
+        client = Client(base_url, token)
+        local_timings = {key: [] for key in timings}
+        local_errors = dict.fromkeys(timings, 0)
+        i = offset
+        try:
+            while time.perf_counter() < deadline:
+                method, path, body = requests[i % len(requests)]
+                key = f'{method} {path}'
+                i += 1
+                start = time.perf_counter()
+                try:
+                    status, _, _ = client.request(method, path, body)
+                except (http.client.HTTPException, OSError):
+                    local_errors[key] += 1
+                    continue
+                if status in ok_statuses:
+                    local_timings[key].append((time.perf_counter() - start) * 1000)
+                else:
+                    local_errors[key] += 1
+        finally:
+            client.close()
+        with lock:
+            for key in timings:
+                timings[key].extend(local_timings[key])
+                errors[key] += local_errors[key]
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'overall': summarize([t for values in timings.values() for t in values], sum(errors.values()), elapsed),
+        'routes': {key: summarize(timings[key], errors[key], elapsed) for key in timings},
+    }
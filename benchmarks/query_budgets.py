@@ -0,0 +1,116 @@
+"""
+Checks every route in tasks/urls.py and users/urls.py against its query
+budget in task_manager_josh.query_budget.QUERY_BUDGETS.
+
+    python -m benchmarks.query_budgets
+
+Runs the benchmarks.api scenario once against a throwaway test database
+(created and destroyed like the test runner's), seeded with enough users,
+tasks and assignments that a per-row query shows up as a budget overrun.
+Prints the queries each route ran and exits with status 1, listing the SQL,
+when a route goes over its budget or has none pinned. After an intentional
+change, update QUERY_BUDGETS with the numbers printed here.
+
+It also pages through a task search a few rows at a time and fails unless
+the pages add up to the unpaginated result. The seeded tasks share most of
+their text, so ranks tie and the (rank, id) cursor is exercised on the
+database in use. Run it against PostgreSQL to cover the tsvector path.
+"""
+import argparse
+import json
+import os
+import sys
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_manager_josh.settings')
+django.setup()
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory
+from django.test.utils import get_runner, setup_test_environment, teardown_test_environment
+
+from benchmarks.api import SCENARIO, build_contexts, request_kwargs, uncovered_routes
+from benchmarks.seed import seed
+from task_manager_josh.pagination import paginate_keyset
+from task_manager_josh.query_budget import QUERY_BUDGETS, assert_query_budget
+from tasks.search import SEARCH_ORDERING, search_tasks
+
+
+def check(ctx):
+    handler = WSGIHandler()
+    factory = RequestFactory()
+    results, failures = [], []
+    for label, url_name, build, callback in SCENARIO:
+        method, path, body = build(ctx)
+        kwargs = {'HTTP_AUTHORIZATION': f"Bearer {ctx['token']}"}
+        if body is not None:
+            kwargs.update(request_kwargs(body))
+        try:
+            with assert_query_budget(url_name) as stats:
+                response = handler(factory.generic(method, path, **kwargs).environ, lambda status, headers: None)
+                content = b''.join(response)
+                response.close()
+        except AssertionError as error:
+            failures.append(f"{label}: {error}")
+            continue
+        if response.status_code >= 400:
+            failures.append(f"{label}: {method} {path} returned {response.status_code}: {content[:200]!r}")
+            continue
+        if callback:
+            callback(ctx, json.loads(content))
+        results.append((label, url_name, stats.queries))
+    return results, failures
+
+
+def check_search_pages(query='benchmark task', page_size=7):
+    expected = list(search_tasks(query).order_by(*SEARCH_ORDERING).values_list('id', flat=True))
+    seen, cursor = [], None
+    while True:
+        rows, cursor = paginate_keyset(search_tasks(query).values('id', 'rank'), SEARCH_ORDERING, cursor, page_size)
+        seen += [row['id'] for row in rows]
+        if cursor is None or len(seen) > len(expected):
+            break
+    if seen == expected:
+        return []
+    return [
+        f"task search pages: paging {len(expected)} results {page_size} at a time returned {len(seen)} rows, "
+        f"{len(set(seen))} distinct, {len(set(expected) - set(seen))} missing"
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=50)
+    parser.add_argument('--assignments', type=int, default=400)
+    args = parser.parse_args(argv)
+
+    failures = [f"{name}: covered by no scenario step" for name in uncovered_routes()]
+    failures += [f"{name}: no entry in QUERY_BUDGETS" for _, name, _, _ in SCENARIO if name not in QUERY_BUDGETS]
+
+    setup_test_environment()
+    runner = get_runner(settings)(verbosity=0, interactive=False)
+    old_config = runner.setup_databases()
+    try:
+        seed(args.users, args.tasks, args.assignments)
+        ctx = build_contexts(1)[0]
+        ctx.update(iteration=0)
+        results, check_failures = check(ctx)
+        check_failures += check_search_pages()
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+    failures += check_failures
+
+    print(f"{'route':<22}{'url name':<32}{'queries':>8}{'budget':>8}")
+    for label, url_name, queries in results:
+        print(f"{label:<22}{url_name:<32}{queries:>8}{QUERY_BUDGETS.get(url_name, '-'):>8}")
+    if failures:
+        print("\nFailed:\n" + '\n\n'.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from tasks.models import Task, UserTask
+from users.models import CustomPermission
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+BATCH_SIZE = 10000
+# Most assignments in a long-lived database are finished ones.
+STATUS_WEIGHTS = {'completed': 70, 'open': 15, 'in_progress': 10, 'blocked': 5}
+
+
+def _batched(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed(users=1000, tasks=10000, assignments=100000, seed_value=0, stdout=None, permission_share=1.0):
+    """
+    Fills an empty database with a reproducible dataset: ``users`` users, the
+    first ``permission_share`` of them holding every custom permission,
+    ``tasks`` tasks (5% inactive) and ``assignments`` UserTask rows spread
+    over distinct (user, task) pairs.
+    """
+    if assignments > users * tasks:
+        raise ValueError("assignments cannot exceed users * tasks")
+    User = get_user_model()
+    if User.objects.exists() or Task.objects.exists():
+        raise RuntimeError("Refusing to seed a database that already contains users or tasks")
+
+    rng = random.Random(seed_value)
+    log = stdout.write if stdout else (lambda message: None)
+    password = make_password(BENCHMARK_PASSWORD)
+
+    for batch in _batched(
+        User(email=f'bench{i}@example.com', username=f'bench{i}', password=password, name=f'Bench User {i}')
+        for i in range(users)
+    ):
+        User.objects.bulk_create(batch)
+    user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+    Through = User.custom_permissions.through
+    permitted = user_ids[:round(users * permission_share)]
+    for permission in CustomPermission.objects.all():
+        for batch in _batched(Through(user_id=user_id, custompermission_id=permission.id) for user_id in permitted):
+            Through.objects.bulk_create(batch)
+    log(f"Seeded {users} users\n")
+
+    task_types = [choice[0] for choice in Task.TASK_TYPE_CHOICES]
+    for batch in _batched(
+        Task(name=f'Task {i}', description=f'Benchmark task number {i}', task_type=rng.choice(task_types),
+             is_active=rng.random() >= 0.05)
+        for i in range(tasks)
+    ):
+        Task.objects.bulk_create(batch)
+    task_ids = list(Task.objects.order_by('id').values_list('id', flat=True))
+    log(f"Seeded {tasks} tasks\n")
+
+    statuses, weights = zip(*STATUS_WEIGHTS.items())
+    now = timezone.now()
+
+    def assignment(i):
+        # i -> distinct (user, task) pair, so the one-active-assignment constraint always holds
+        status = rng.choices(statuses, weights)[0]
+        return UserTask(
+            user_id=user_ids[i % users], task_id=task_ids[(i // users + i % users) % tasks], status=status,
+            completed_at=now if status == 'completed' else None,
+        )
+
+    created = 0
+    for batch in _batched(assignment(i) for i in range(assignments)):
+        UserTask.objects.bulk_create(batch)
+        created += len(batch)
+        if created % (BATCH_SIZE * 10) == 0:
+            log(f"  {created}/{assignments} assignments\n")
+    log(f"Seeded {assignments} assignments\n")
+    return user_ids, task_ids
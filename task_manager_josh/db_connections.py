@@ -0,0 +1,63 @@
+import threading
+from collections import Counter
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_opened = Counter()
+_opened_lock = threading.Lock()
+
+# psycopg-pool statistic -> name reported by get_connection_stats()
+POOL_STATS = {
+    'requests_num': 'checkouts',
+    'requests_queued': 'waits',
+    'requests_wait_ms': 'wait_ms',
+    'requests_errors': 'timeouts',
+    'connections_num': 'connections_opened',
+    'connections_errors': 'connection_errors',
+    'connections_lost': 'connections_lost',
+    'returns_bad': 'returns_bad',
+    'pool_min': 'min_size',
+    'pool_max': 'max_size',
+    'pool_size': 'size',
+    'pool_available': 'available',
+    'requests_waiting': 'waiting',
+}
+
+
+def _count_connection(sender, connection, **kwargs):
+    with _opened_lock:
+        _opened[connection.alias] += 1
+
+
+connection_created.connect(_count_connection, dispatch_uid='db_connections_count')
+
+
+def _mode(settings_dict):
+    if settings_dict['OPTIONS'].get('pool'):
+        return 'pool'
+    return 'per_request' if settings_dict['CONN_MAX_AGE'] == 0 else 'persistent'
+
+
+def get_connection_stats():
+    """
+    Per-alias connection statistics for this process: the reuse mode, how
+    many times Django connected (a pool checkout counts as one) and, for
+    pooled aliases, the pool's checkouts, waits and timeouts.
+    """
+    with _opened_lock:
+        opened = dict(_opened)
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        mode = _mode(connection.settings_dict)
+        stats[alias] = {
+            'mode': mode,
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            'health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+            'connects': opened.get(alias, 0),
+        }
+        if mode == 'pool':
+            pool_stats = connection.pool.get_stats()
+            stats[alias]['pool'] = {name: pool_stats.get(key, 0) for key, name in POOL_STATS.items()}
+    return stats
@@ -0,0 +1,150 @@
+import contextvars
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import request_finished
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import SimpleLazyObject
+
+# Users who wrote within the last REPLICA_PIN_SECONDS read from the primary,
+# so they never see a replica that has not caught up with their own change.
+PIN_CACHE_KEY = 'db_pin:{user_id}'
+
+
+class _RequestState:
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+
+
+def _clear_state(**kwargs):
+    _state.set(None)
+
+
+# Cleared once the response is closed rather than when the middleware
+# returns, because streamed bodies are read after that.
+request_finished.connect(_clear_state, dispatch_uid='db_router_clear_state')
+
+
+def _get_cache():
+    return caches[settings.REPLICA_PIN_CACHE_ALIAS]
+
+
+def _user_pin_key(user):
+    if user is None or isinstance(user, SimpleLazyObject) or not user.is_authenticated:
+        return None
+    return PIN_CACHE_KEY.format(user_id=user.id)
+
+
+def _route_to_replica(state, pinned):
+    if not pinned and not state.wrote and settings.DATABASE_REPLICAS:
+        state.replica = random.choice(settings.DATABASE_REPLICAS)
+
+
+def use_replica(user):
+    """
+    Sends the rest of the current request's reads to one replica, unless
+    ``user`` wrote recently or the request has written already.
+    """
+    state = _state.get()
+    if state is None:
+        return
+    key = _user_pin_key(user)
+    _route_to_replica(state, key is not None and _get_cache().get(key) is not None)
+
+
+async def ause_replica(user):
+    state = _state.get()
+    if state is None:
+        return
+    key = _user_pin_key(user)
+    _route_to_replica(state, key is not None and await _get_cache().aget(key) is not None)
+
+
+class ReplicaReadsMixin:
+    """
+    For read-only APIViews: once the request is authenticated and permitted,
+    the handler's queries go to a read replica.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        use_replica(request.user)
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes always go to the primary. Reads go to the primary too, except in
+    views that opted in with ReplicaReadsMixin (or ``replica_reads`` on
+    AsyncAPIView); any write in the request sends later reads back to the
+    primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        state = _state.get()
+        if state is not None and state.replica and not state.wrote:
+            return state.replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        return db == DEFAULT_DB_ALIAS
+
+
+class DatabaseRoutingMiddleware:
+    """
+    Tracks replica reads and writes for each request and, after a request
+    that wrote, pins the user to the primary for REPLICA_PIN_SECONDS.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _pin_key(self, request, state):
+        if not state.wrote or not settings.DATABASE_REPLICAS or not settings.REPLICA_PIN_SECONDS:
+            return None
+        # DRF and AsyncAPIView replace the lazy session user with the token user.
+        return _user_pin_key(request.__dict__.get('user'))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = _RequestState()
+        _state.set(state)
+        response = self.get_response(request)
+        key = self._pin_key(request, state)
+        if key:
+            _get_cache().set(key, True, timeout=settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        state = _RequestState()
+        _state.set(state)
+        response = await self.get_response(request)
+        key = self._pin_key(request, state)
+        if key:
+            await _get_cache().aset(key, True, timeout=settings.REPLICA_PIN_SECONDS)
+        return response
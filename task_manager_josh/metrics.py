@@ -0,0 +1,298 @@
+import atexit
+import fcntl
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+from .db_connections import get_connection_stats
+from .query_budget import current_query_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# name -> (type, help, buckets)
+METRICS = {
+    'http_requests_total': ('counter', "Requests by URL name, method and status code.", None),
+    'http_request_duration_seconds': ('histogram', "Time from receiving a request to sending the last byte.", LATENCY_BUCKETS),
+    'http_response_size_bytes': ('histogram', "Response body size.", SIZE_BUCKETS),
+    'http_request_db_seconds_total': ('counter', "Database time spent serving requests.", None),
+    'http_request_db_queries_total': ('counter', "SQL queries run serving requests.", None),
+    'task_cache_lookups_total': ('counter', "Task cache lookups by result.", None),
+    'db_connections_opened_total': ('counter', "Database connections opened, including pool checkouts.", None),
+    'db_pool_checkouts_total': ('counter', "Connections checked out of the pool.", None),
+    'db_pool_waits_total': ('counter', "Pool checkouts that had to wait for a connection.", None),
+    'db_pool_timeouts_total': ('counter', "Pool checkouts that timed out.", None),
+}
+# Totals of exited processes, folded together so METRICS_DIR does not grow
+# with every worker restart while counters still never go backwards.
+DEAD_PROCESSES_FILE = 'dead.json'
+POOL_COUNTERS = {'checkouts': 'db_pool_checkouts_total', 'waits': 'db_pool_waits_total', 'timeouts': 'db_pool_timeouts_total'}
+
+
+class _Registry:
+    """
+    This process's metrics: counters map (name, labels) to a value and
+    histograms map (name, labels) to [per-bucket counts..., +Inf count, sum].
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.last_flush = time.monotonic()
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = [0] * (len(buckets) + 2)
+        histogram[bisect_left(buckets, value)] += 1
+        histogram[-1] += value
+
+    def record(self, view, method, status_code, seconds, size, query_stats):
+        labels = (('view', view),)
+        with self.lock:
+            self.inc('http_requests_total', (('method', method), ('status', str(status_code)), ('view', view)))
+            self.observe('http_request_duration_seconds', labels, seconds)
+            self.observe('http_response_size_bytes', labels, size)
+            if query_stats is not None:
+                self.inc('http_request_db_seconds_total', labels, query_stats.db_ms / 1000)
+                self.inc('http_request_db_queries_total', labels, query_stats.queries)
+            if settings.METRICS_DIR and time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_INTERVAL:
+                self._write()
+
+    def snapshot(self):
+        """Request metrics plus this process's task cache and connection counters."""
+        from tasks.task_cache import get_task_cache_stats
+
+        counters = dict(self.counters)
+        cache_stats = get_task_cache_stats()
+        for result in ('hits', 'misses'):
+            counters[('task_cache_lookups_total', (('result', result),))] = cache_stats[result]
+        for alias, stats in get_connection_stats().items():
+            labels = (('alias', alias),)
+            counters[('db_connections_opened_total', labels)] = stats['connects']
+            if 'pool' in stats:
+                for stat, name in POOL_COUNTERS.items():
+                    counters[(name, labels)] = stats['pool'][stat]
+        return {
+            'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+            'histograms': [[name, list(labels), values] for (name, labels), values in self.histograms.items()],
+        }
+
+    def flush(self):
+        if settings.METRICS_DIR:
+            with self.lock:
+                self._write()
+
+    def _write(self):
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        path = os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + '.tmp', path)
+        self.last_flush = time.monotonic()
+
+
+registry = _Registry()
+atexit.register(registry.flush)
+
+
+def _merge(snapshots):
+    counters, histograms = {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.get(key)
+            histograms[key] = values if merged is None else [a + b for a, b in zip(merged, values)]
+    return counters, histograms
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def mark_process_dead(pid):
+    """
+    Folds an exited process's file into METRICS_DIR/dead.json. collect()
+    does this for any process that is gone; call it from the server's
+    worker exit hook (gunicorn's ``child_exit``) to do it right away.
+    """
+    path = os.path.join(settings.METRICS_DIR, f'{pid}.json')
+    # Collectors in several processes may prune at once.
+    with open(os.path.join(settings.METRICS_DIR, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        snapshot = _read(path)
+        if snapshot is None:
+            return
+        dead_path = os.path.join(settings.METRICS_DIR, DEAD_PROCESSES_FILE)
+        dead = _read(dead_path)
+        counters, histograms = _merge([snapshot] if dead is None else [dead, snapshot])
+        with open(dead_path + '.tmp', 'w') as f:
+            json.dump({
+                'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+                'histograms': [[name, list(labels), values] for (name, labels), values in histograms.items()],
+            }, f)
+        os.replace(dead_path + '.tmp', dead_path)
+        os.remove(path)
+
+
+def collect():
+    """
+    Merged metrics: with METRICS_DIR, of every process that wrote a file
+    there (this one is written first) plus the folded totals of exited
+    ones; otherwise of this process only.
+    """
+    if not settings.METRICS_DIR:
+        with registry.lock:
+            return _merge([registry.snapshot()])
+    registry.flush()
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+        name = os.path.basename(path)[:-len('.json')]
+        if name.isdigit() and not _process_alive(int(name)):
+            mark_process_dead(int(name))
+    snapshots = [_read(path) for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json'))]
+    return _merge([snapshot for snapshot in snapshots if snapshot is not None])
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    counters, histograms = collect()
+    metrics = counters | histograms
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted(
+            ((labels, value) for (metric, labels), value in metrics.items() if metric == name),
+            key=lambda item: item[0],
+        )
+        if not series:
+            continue
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for labels, value in series:
+            if kind == 'counter':
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip([*buckets, '+Inf'], value[:-1]):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value[-1])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+class IsMetricsClient(BasePermission):
+    """
+    Lets through requests from an address in METRICS_ALLOWED_IPS that also
+    carry ``Authorization: Bearer <METRICS_TOKEN>`` when a token is set.
+    Behind a reverse proxy every request comes from the proxy's address, so
+    the address check alone is only safe when clients connect directly.
+    """
+
+    def has_permission(self, request, view):
+        if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+            return False
+        if not settings.METRICS_TOKEN:
+            return True
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        return hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', '').encode(), expected.encode())
+
+
+class MetricsMiddleware:
+    """
+    Records, per URL name, request counts by method and status, latency and
+    response size histograms, and database time and queries (as measured by
+    QueryCountMiddleware, which must come after it). Streamed responses are
+    recorded when the stream ends.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _record(self, request, response, start, size):
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else 'unresolved'
+        registry.record(view, request.method, response.status_code, time.perf_counter() - start, size,
+                        current_query_stats())
+
+    def _respond(self, request, response, start):
+        if not response.streaming:
+            self._record(request, response, start, len(response.content))
+        elif response.is_async:
+            response.streaming_content = self._arecord_after(response.streaming_content, request, response, start)
+        else:
+            response.streaming_content = self._record_after(response.streaming_content, request, response, start)
+        return response
+
+    def _record_after(self, content, request, response, start):
+        size = 0
+        for chunk in content:
+            size += len(chunk)
+            yield chunk
+        self._record(request, response, start, size)
+
+    async def _arecord_after(self, content, request, response, start):
+        size = 0
+        async for chunk in content:
+            size += len(chunk)
+            yield chunk
+        self._record(request, response, start, size)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        return self._respond(request, self.get_response(request), start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        return self._respond(request, await self.get_response(request), start)
@@ -0,0 +1,163 @@
+import atexit
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+
+PROFILE_HEADER = 'HTTP_X_PROFILE_TOKEN'
+PROFILE_TOKEN_SALT = 'task_manager_josh.profiling'
+
+
+def make_profile_token():
+    """A token for the X-Profile-Token header, valid for PROFILING_TOKEN_MAX_AGE seconds."""
+    return signing.dumps('profile', salt=PROFILE_TOKEN_SALT)
+
+
+def valid_profile_token(token):
+    try:
+        return signing.loads(token, salt=PROFILE_TOKEN_SALT, max_age=settings.PROFILING_TOKEN_MAX_AGE) == 'profile'
+    except signing.BadSignature:
+        return False
+
+
+def _function_label(func):
+    filename, line, name = func
+    if filename == '~':
+        return name
+    return f'{name} ({os.path.basename(filename)}:{line})'
+
+
+def collapsed_stacks(stats):
+    """
+    Folds a pstats.Stats into "frame;frame;frame microseconds" lines for
+    flame graph tools. cProfile only records caller/callee pairs, so a
+    function's own time is split over its call paths in proportion to the
+    cumulative time each caller spent in it.
+    """
+    entries = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            callees.setdefault(caller, []).append((func, cumulative))
+    folded = {}
+    roots = [func for func, entry in entries.items() if not entry[4]]
+    # Paths below this share of the total are dropped to bound the walk.
+    cutoff = sum(entries[func][3] for func in roots) * 1e-4
+
+    def walk(func, path, share):
+        _, _, own, cumulative, _ = entries[func]
+        path = path + (_function_label(func),)
+        microseconds = round(own * share * 1e6)
+        if microseconds:
+            folded[path] = folded.get(path, 0) + microseconds
+        for callee, edge_cumulative in callees.get(func, ()):
+            callee_cumulative = entries[callee][3]
+            if not callee_cumulative or _function_label(callee) in path:
+                continue
+            callee_share = share * min(edge_cumulative / callee_cumulative, 1.0)
+            if callee_cumulative * callee_share >= cutoff:
+                walk(callee, path, callee_share)
+
+    for func in roots:
+        walk(func, (), 1.0)
+    return [f"{';'.join(path)} {value}" for path, value in sorted(folded.items())]
+
+
+def _profiled_request(get_response, request):
+    # Called only here, so it is the single root of every request profile.
+    return get_response(request)
+
+
+def _view_dirname(view):
+    return re.sub(r'[^\w.-]', '_', view)
+
+
+class _ViewProfile:
+    __slots__ = ('stats', 'requests', 'wall_ms', 'unflushed')
+
+    def __init__(self):
+        self.stats = None
+        self.requests = 0
+        self.wall_ms = 0.0
+        self.unflushed = 0
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a PROFILING_SAMPLE_RATE share of requests, and every request
+    carrying a valid X-Profile-Token header, with cProfile. Profiles are
+    merged per view in memory and written under PROFILING_DIR/<view>/ as
+    pstats (<process>.prof), collapsed stacks (<process>.collapsed) and the
+    request count and wall time (<process>.json); `manage.py
+    summarize_profiles` merges them across processes. Only the view and
+    middleware run until the response is returned is profiled, not the
+    iteration of a streamed body. Not installed unless PROFILING_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.started = int(time.time())
+        self.views = {}
+        self.lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def __call__(self, request):
+        token = request.META.get(PROFILE_HEADER)
+        forced = token is not None and valid_profile_token(token)
+        if not forced and (not self.sample_rate or random.random() >= self.sample_rate):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        response = profiler.runcall(_profiled_request, self.get_response, request)
+        wall_ms = (time.perf_counter() - start) * 1000
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else 'unresolved'
+        self.record(view, profiler, wall_ms, flush=forced)
+        return response
+
+    def record(self, view, profiler, wall_ms, flush=False):
+        with self.lock:
+            profile = self.views.setdefault(view, _ViewProfile())
+            if profile.stats is None:
+                profile.stats = pstats.Stats(profiler)
+            else:
+                profile.stats.add(profiler)
+            profile.requests += 1
+            profile.wall_ms += wall_ms
+            profile.unflushed += 1
+            if flush or profile.unflushed >= settings.PROFILING_FLUSH_EVERY:
+                self._write(view, profile)
+
+    def flush(self):
+        with self.lock:
+            for view, profile in self.views.items():
+                if profile.unflushed:
+                    self._write(view, profile)
+
+    def _write(self, view, profile):
+        directory = os.path.join(settings.PROFILING_DIR, _view_dirname(view))
+        os.makedirs(directory, exist_ok=True)
+        # Read at write time: workers forked after startup get their own files.
+        base = os.path.join(directory, f'{os.getpid()}-{self.started}')
+        # Each file holds this process's totals so far, so rewriting it is
+        # idempotent; replace() keeps readers from seeing a partial file.
+        profile.stats.dump_stats(base + '.prof.tmp')
+        os.replace(base + '.prof.tmp', base + '.prof')
+        with open(base + '.collapsed.tmp', 'w') as f:
+            f.write('\n'.join(collapsed_stacks(profile.stats)) + '\n')
+        os.replace(base + '.collapsed.tmp', base + '.collapsed')
+        with open(base + '.json.tmp', 'w') as f:
+            json.dump({'view': view, 'requests': profile.requests, 'wall_ms': round(profile.wall_ms, 3)}, f)
+        os.replace(base + '.json.tmp', base + '.json')
+        profile.unflushed = 0
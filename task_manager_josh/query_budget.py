@@ -0,0 +1,212 @@
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('task_manager_josh.queries')
+
+# URL name -> most queries one request may run, for the most expensive
+# variant of the request. Requests over budget are logged, and
+# `python -m benchmarks.query_budgets` fails when a route exceeds its entry.
+# Raise an entry only together with the change that needs it.
+QUERY_BUDGETS = {
+    'signup': 4,
+    'signin': 4,
+    'fetch_users': 5,
+    'fetch_users_async': 5,
+    'token_refresh': 2,
+    'add_permission_to_user': 8,
+    'remove_permission_from_user': 7,
+    'task-create': 5,
+    'task-create-batch': 5,
+    'task-import': 8,
+    'task-assign': 12,
+    'user-tasks': 4,
+    'user-tasks-async': 4,
+    'task-delete': 7,
+    'task-update': 6,
+    'task-fetch': 4,
+    'task-fetch-async': 4,
+    'task-search': 2,
+    'update-user-task-status-by-id': 6,
+    'bulk-update-user-task-status': 7,
+    'export-create': 3,
+    'export-status': 2,
+    'export-download': 2,
+}
+
+
+class QueryStats:
+    __slots__ = ('queries', 'db_ms', 'statements', 'parent', 'request_level')
+
+    def __init__(self, capture_sql=False, parent=None, request_level=False):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.statements = [] if capture_sql else None
+        self.parent = parent
+        self.request_level = request_level
+
+
+_current = contextvars.ContextVar('query_stats', default=None)
+_view_stats = {}
+_view_stats_lock = threading.Lock()
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        # Nested trackers (a test helper around a request) all see the query.
+        while stats is not None:
+            stats.queries += 1
+            stats.db_ms += elapsed
+            if stats.statements is not None:
+                stats.statements.append(sql)
+            stats = stats.parent
+
+
+def _install(sender, connection, **kwargs):
+    # First in the list: execute_wrapper() blocks pop the last entry on exit.
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def _end_request(**kwargs):
+    stats = _current.get()
+    if stats is not None and stats.request_level:
+        _current.set(stats.parent)
+
+
+connection_created.connect(_install, dispatch_uid='query_budget_install')
+request_finished.connect(_end_request, dispatch_uid='query_budget_end_request')
+for _connection in connections.all(initialized_only=True):
+    if _connection.connection is not None:
+        _install(None, _connection)
+
+
+@contextmanager
+def track_queries(capture_sql=False):
+    """Counts the queries and database time of the block, on every alias."""
+    stats = QueryStats(capture_sql, parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def current_query_stats():
+    """The QueryStats of the request being served, or None outside one."""
+    return _current.get()
+
+
+def get_query_budget(url_name):
+    return QUERY_BUDGETS.get(url_name, settings.QUERY_BUDGET_DEFAULT)
+
+
+@contextmanager
+def assert_query_budget(url_name, budget=None):
+    """
+    Test helper: fails with the executed SQL when the block runs more
+    queries than the endpoint's entry in QUERY_BUDGETS (or ``budget``).
+    """
+    budget = get_query_budget(url_name) if budget is None else budget
+    with track_queries(capture_sql=True) as stats:
+        yield stats
+    if stats.queries > budget:
+        statements = '\n'.join(f'{i}. {sql}' for i, sql in enumerate(stats.statements, 1))
+        raise AssertionError(f"{url_name} ran {stats.queries} queries, budget is {budget}:\n{statements}")
+
+
+def get_view_query_stats():
+    """Per-view totals for this process: requests, queries, DB time, maximum and over-budget count."""
+    with _view_stats_lock:
+        return {view: dict(stats) for view, stats in _view_stats.items()}
+
+
+class QueryCountMiddleware:
+    """
+    Counts the SQL queries and database time of every request, logs requests
+    over their view's budget and, with QUERY_COUNT_HEADERS, reports both in
+    X-DB-Query-Count and X-DB-Time-Ms. Streamed responses are checked once
+    the stream is exhausted, so their row queries are included.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _start(self):
+        stats = QueryStats(parent=_current.get(), request_level=True)
+        # Left set after the response is returned so streamed rows are
+        # counted; request_finished restores the previous tracker.
+        _current.set(stats)
+        return stats
+
+    def _finish(self, request, stats, status_code):
+        match = request.resolver_match
+        view = match.url_name or match.view_name if match else None
+        budget = get_query_budget(view)
+        over_budget = stats.queries > budget
+        if view:
+            with _view_stats_lock:
+                totals = _view_stats.setdefault(
+                    view, {'requests': 0, 'queries': 0, 'db_ms': 0.0, 'max_queries': 0, 'over_budget': 0}
+                )
+                totals['requests'] += 1
+                totals['queries'] += stats.queries
+                totals['db_ms'] += stats.db_ms
+                totals['max_queries'] = max(totals['max_queries'], stats.queries)
+                totals['over_budget'] += over_budget
+        if over_budget:
+            logger.warning(
+                "%s %s (%s) ran %d queries in %.1f ms, budget is %d",
+                request.method, request.path, view, stats.queries, stats.db_ms, budget,
+                extra={'view': view, 'queries': stats.queries, 'db_ms': stats.db_ms, 'status_code': status_code},
+            )
+
+    def _respond(self, request, response, stats):
+        if not response.streaming:
+            self._finish(request, stats, response.status_code)
+            if settings.QUERY_COUNT_HEADERS:
+                response['X-DB-Query-Count'] = str(stats.queries)
+                response['X-DB-Time-Ms'] = f'{stats.db_ms:.2f}'
+        elif response.is_async:
+            response.streaming_content = self._afinish_after(response.streaming_content, request, stats, response.status_code)
+        else:
+            response.streaming_content = self._finish_after(response.streaming_content, request, stats, response.status_code)
+        return response
+
+    def _finish_after(self, content, request, stats, status_code):
+        yield from content
+        self._finish(request, stats, status_code)
+
+    async def _afinish_after(self, content, request, stats, status_code):
+        async for chunk in content:
+            yield chunk
+        self._finish(request, stats, status_code)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = self._start()
+        return self._respond(request, self.get_response(request), stats)
+
+    async def __acall__(self, request):
+        stats = self._start()
+        return self._respond(request, await self.get_response(request), stats)
@@ -15,6 +15,7 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
 
 load_dotenv()
 
@@ -50,6 +51,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'task_manager_josh.metrics.MetricsMiddleware',
+    'task_manager_josh.query_budget.QueryCountMiddleware',
+    'task_manager_josh.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,6 +61,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'task_manager_josh.db_router.DatabaseRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'task_manager_josh.urls'
@@ -85,15 +90,152 @@ WSGI_APPLICATION = 'task_manager_josh.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': os.environ.get('DB_ENGINE', 'django.db.backends.postgresql'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASSWORD'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': os.environ.get('DB_PORT'),
+        # Seconds to keep a connection open between requests (0 closes it
+        # after each request, "None" never does). Ignored when pooling.
+        'CONN_MAX_AGE': None if os.environ.get('DB_CONN_MAX_AGE', '0').lower() == 'none'
+            else int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True').lower() in ('true', '1', 'yes'),
     }
 }
 
+# In-process connection pool (PostgreSQL with psycopg 3 and psycopg-pool only).
+DB_POOL = os.environ.get('DB_POOL', 'False').lower() in ('true', '1', 'yes')
+if DB_POOL:
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            # Seconds a request waits for a free connection before failing.
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        },
+    }
+
+# Read replicas, one per entry in the comma-separated DB_REPLICA_HOSTS (or
+# DB_REPLICA_NAMES, e.g. SQLite files). Unset DB_REPLICA_* values fall back
+# to the primary's.
+_replica_hosts = [host for host in os.environ.get('DB_REPLICA_HOSTS', '').split(',') if host]
+_replica_names = [name for name in os.environ.get('DB_REPLICA_NAMES', '').split(',') if name]
+for _i in range(max(len(_replica_hosts), len(_replica_names))):
+    DATABASES[f'replica_{_i}'] = {
+        **DATABASES['default'],
+        'NAME': _replica_names[_i] if _i < len(_replica_names) else os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': _replica_hosts[_i] if _i < len(_replica_hosts) else DATABASES['default']['HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['task_manager_josh.db_router.PrimaryReplicaRouter']
+# Seconds a user keeps reading from the primary after a write.
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+REPLICA_PIN_CACHE_ALIAS = 'replica_pins'
+
+# Query budgets: requests running more queries than their view's entry in
+# task_manager_josh.query_budget.QUERY_BUDGETS (or this default) are logged.
+QUERY_BUDGET_DEFAULT = int(os.environ.get('QUERY_BUDGET_DEFAULT', 10))
+QUERY_COUNT_HEADERS = os.environ.get('QUERY_COUNT_HEADERS', str(DEBUG)).lower() in ('true', '1', 'yes')
+
+# Statements slower than SLOW_QUERY_MS (empty disables the log) are written
+# as JSON lines to the rotating SLOW_QUERY_LOG, with an EXPLAIN (ANALYZE,
+# BUFFERS) plan on PostgreSQL; rank them with `manage.py rank_slow_queries`.
+_slow_query_ms = os.environ.get('SLOW_QUERY_MS', '200')
+SLOW_QUERY_MS = float(_slow_query_ms) if _slow_query_ms else None
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', str(BASE_DIR / 'logs' / 'slow_queries.log'))
+SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024))
+SLOW_QUERY_LOG_BACKUPS = int(os.environ.get('SLOW_QUERY_LOG_BACKUPS', 5))
+SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'True').lower() in ('true', '1', 'yes')
+# EXPLAIN ANALYZE re-runs the statement, so each fingerprint is explained at
+# most once per this many seconds per process.
+SLOW_QUERY_EXPLAIN_INTERVAL = int(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL', 300))
+
+# File exports (tasks.exports), written by `manage.py run_export_worker`.
+EXPORT_DIR = os.environ.get('EXPORT_DIR', str(BASE_DIR / 'exports'))
+EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', 2))
+EXPORT_POLL_INTERVAL = float(os.environ.get('EXPORT_POLL_INTERVAL', 2))
+# Rows per server-side cursor fetch, and rows between progress updates.
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+EXPORT_PROGRESS_EVERY = int(os.environ.get('EXPORT_PROGRESS_EVERY', 10000))
+
+# Bulk imports (tasks.imports): rows validated and written per transaction,
+# whether PostgreSQL loads them with COPY, and how many rejected rows a
+# report lists (all are counted).
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 5000))
+IMPORT_USE_COPY = os.environ.get('IMPORT_USE_COPY', 'True').lower() in ('true', '1', 'yes')
+IMPORT_MAX_REPORTED_REJECTS = int(os.environ.get('IMPORT_MAX_REPORTED_REJECTS', 100))
+
+# Request metrics served at /metrics/. With METRICS_DIR set, each process
+# writes its metrics there every METRICS_FLUSH_INTERVAL seconds and the
+# endpoint sums all files, for multi-process servers such as gunicorn.
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+METRICS_ALLOWED_IPS = [ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip]
+# Required as "Authorization: Bearer <token>" when set. Set it whenever a
+# proxy on an allowed address forwards requests to the app.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Request profiling (task_manager_josh.profiling): off unless enabled. Then a
+# PROFILING_SAMPLE_RATE share of requests, plus requests sent with a token
+# from `manage.py profiling_token` in X-Profile-Token, are profiled.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() in ('true', '1', 'yes')
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_DIR = os.environ.get('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+# Sampled profiles are written every this many requests per view.
+PROFILING_FLUSH_EVERY = int(os.environ.get('PROFILING_FLUSH_EVERY', 20))
+PROFILING_TOKEN_MAX_AGE = int(os.environ.get('PROFILING_TOKEN_MAX_AGE', 3600))
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    'permissions': {
+        'BACKEND': os.environ.get('PERMISSION_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('PERMISSION_CACHE_LOCATION', 'permissions'),
+        'TIMEOUT': int(os.environ.get('PERMISSION_CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('PERMISSION_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+    # Read-your-writes pins (REPLICA_PIN_SECONDS). A user's next request may
+    # reach any worker, so with replicas this must be shared (Redis,
+    # Memcached, ...); a per-process backend is refused below.
+    'replica_pins': {
+        'BACKEND': os.environ.get('REPLICA_PIN_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('REPLICA_PIN_CACHE_LOCATION', 'replica_pins'),
+    },
+    'tasks': {
+        'BACKEND': os.environ.get('TASK_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('TASK_CACHE_LOCATION', 'tasks'),
+        'TIMEOUT': int(os.environ.get('TASK_CACHE_TIMEOUT', 60)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('TASK_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+}
+
+PERMISSION_CACHE_ALIAS = 'permissions'
+TASK_CACHE_ALIAS = 'tasks'
+
+if DATABASE_REPLICAS and CACHES[REPLICA_PIN_CACHE_ALIAS]['BACKEND'] in (
+    'django.core.cache.backends.locmem.LocMemCache', 'django.core.cache.backends.dummy.DummyCache',
+):
+    raise ImproperlyConfigured(
+        "Read replicas need a shared REPLICA_PIN_CACHE_BACKEND (e.g. Redis or Memcached): "
+        "with a per-process cache, users can read a replica that is behind their own writes."
+    )
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -136,18 +278,35 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Stateless mode authenticates from access token claims without loading the User row.
+JWT_STATELESS_AUTH = os.environ.get('JWT_STATELESS_AUTH', 'False').lower() in ('true', '1', 'yes')
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication'
+        if JWT_STATELESS_AUTH else
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
 }
 
+# Cursor pagination for list endpoints
+PAGINATION_PAGE_SIZE = int(os.environ.get('PAGINATION_PAGE_SIZE', 50))
+PAGINATION_MAX_PAGE_SIZE = int(os.environ.get('PAGINATION_MAX_PAGE_SIZE', 500))
+
+# Rows fetched per database round trip and flushed per write by ?stream=true listings
+STREAMING_CHUNK_SIZE = int(os.environ.get('STREAMING_CHUNK_SIZE', 2000))
+
+# Batch task creation
+TASK_BATCH_MAX_SIZE = int(os.environ.get('TASK_BATCH_MAX_SIZE', 5000))
+TASK_BATCH_CHUNK_SIZE = int(os.environ.get('TASK_BATCH_CHUNK_SIZE', 500))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    'TOKEN_USER_CLASS': 'users.authentication.ClaimsTokenUser',
 }
 
 AUTH_USER_MODEL = 'users.User'
@@ -0,0 +1,167 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('task_manager_josh.slow_queries')
+logger.propagate = False
+_handler_lock = threading.Lock()
+_explained = {}
+_explained_lock = threading.Lock()
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Instrumentation whose frames say nothing about where a query came from.
+SKIPPED_FRAMES = {
+    os.path.join(PROJECT_DIR, 'task_manager_josh', name)
+    for name in ('slow_queries.py', 'query_budget.py', 'db_router.py', 'metrics.py', 'profiling.py')
+}
+SAFE_PARAM_TYPES = (bool, int, float, type(None))
+
+
+def fingerprint(sql):
+    """SQL with literals and IN lists collapsed, so repeats of a statement group together."""
+    normalized = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    normalized = re.sub(r'\b\d+(?:\.\d+)?\b', '?', normalized)
+    normalized = re.sub(r'%s', '?', normalized)
+    normalized = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(...)', normalized)
+    return ' '.join(normalized.split())
+
+
+def redact(params, many):
+    # Numbers, booleans and NULLs identify rows; strings and other values
+    # may hold emails, passwords or tokens and are reduced to their type.
+    if params is None:
+        return None
+    if many:
+        return f'<{len(params)} rows>' if hasattr(params, '__len__') else '<rows>'
+    if isinstance(params, dict):
+        return {key: redact([value], False)[0] for key, value in params.items()}
+    return [value if isinstance(value, SAFE_PARAM_TYPES) else f'<{type(value).__name__}>' for value in params]
+
+
+def _caller():
+    """(view, frame): the view method and the innermost project frame running the query."""
+    frame = sys._getframe(1)
+    origin = view = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(PROJECT_DIR) and 'site-packages' not in filename and filename not in SKIPPED_FRAMES:
+            name = getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)
+            origin = origin or f'{os.path.relpath(filename, PROJECT_DIR)}:{frame.f_lineno} in {name}'
+            if os.path.basename(filename) in ('views.py', 'async_views.py'):
+                view = name
+                break
+        frame = frame.f_back
+    return view, origin
+
+
+def _explain(connection, sql, params, key):
+    if not settings.SLOW_QUERY_EXPLAIN or connection.vendor != 'postgresql':
+        return None
+    # EXPLAIN ANALYZE runs the statement again, so only plain reads, and only
+    # once per fingerprint every SLOW_QUERY_EXPLAIN_INTERVAL seconds.
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    now = time.monotonic()
+    with _explained_lock:
+        if now - _explained.get(key, -settings.SLOW_QUERY_EXPLAIN_INTERVAL) < settings.SLOW_QUERY_EXPLAIN_INTERVAL:
+            return None
+        _explained[key] = now
+    # A raw driver cursor keeps the EXPLAIN out of the execute wrappers (and
+    # so out of query counts); the savepoint keeps a failure from aborting
+    # the caller's transaction.
+    cursor = connection.connection.cursor()
+    try:
+        if connection.in_atomic_block:
+            cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        except Exception as error:
+            if connection.in_atomic_block:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            return f'EXPLAIN failed: {error}'
+        if connection.in_atomic_block:
+            cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        return plan
+    finally:
+        cursor.close()
+
+
+def _get_logger():
+    if not logger.handlers:
+        with _handler_lock:
+            if not logger.handlers:
+                os.makedirs(os.path.dirname(settings.SLOW_QUERY_LOG), exist_ok=True)
+                handler = RotatingFileHandler(
+                    settings.SLOW_QUERY_LOG,
+                    maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+                    backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+                )
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                logger.addHandler(handler)
+                logger.setLevel(logging.WARNING)
+    return logger
+
+
+def _log_slow_queries(execute, sql, params, many, context):
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if elapsed_ms >= settings.SLOW_QUERY_MS:
+        connection = context['connection']
+        normalized = fingerprint(sql)
+        key = hashlib.sha1(normalized.encode()).hexdigest()[:12]
+        view, origin = _caller()
+        entry = {
+            'time': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'ms': round(elapsed_ms, 3),
+            'alias': connection.alias,
+            'fingerprint': key,
+            'sql': sql,
+            'params': redact(params, many),
+            'view': view,
+            'frame': origin,
+            'plan': None if many else _explain(connection, sql, params, key),
+        }
+        _get_logger().warning(json.dumps(entry, default=str))
+    return result
+
+
+def _install(sender, connection, **kwargs):
+    # First in the list: execute_wrapper() blocks pop the last entry on exit.
+    if settings.SLOW_QUERY_MS is not None and _log_slow_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _log_slow_queries)
+
+
+connection_created.connect(_install, dispatch_uid='slow_queries_install')
+for _connection in connections.all(initialized_only=True):
+    if _connection.connection is not None:
+        _install(None, _connection)
+
+
+def read_slow_queries(since=None, path=None):
+    """Entries from the slow query log and its rotated backups, oldest first."""
+    path = path or settings.SLOW_QUERY_LOG
+    files = [f'{path}.{i}' for i in range(settings.SLOW_QUERY_LOG_BACKUPS, 0, -1)] + [path]
+    for name in files:
+        if not os.path.exists(name):
+            continue
+        with open(name) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if since is None or datetime.datetime.fromisoformat(entry['time']) >= since:
+                    yield entry
@@ -0,0 +1,57 @@
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def streaming_requested(request):
+    return request.query_params.get('stream', 'false').lower() in ('true', '1', 'yes')
+
+
+def stream_envelope(envelope, rows, status=200):
+    """
+    Streams ``{**envelope, "data": [...]}`` as JSON, encoding ``rows`` as they
+    are produced so memory stays flat however long the list is. ``rows``
+    should come from ``queryset.iterator(chunk_size=...)``.
+    """
+    chunk_size = settings.STREAMING_CHUNK_SIZE
+
+    def generate():
+        head = json.dumps(envelope, cls=JSONEncoder)
+        yield head[:-1] + (', ' if envelope else '') + '"data": ['
+        chunk, separator = [], ''
+        for row in rows:
+            chunk.append(separator + json.dumps(row, cls=JSONEncoder))
+            separator = ','
+            if len(chunk) == chunk_size:
+                yield ''.join(chunk)
+                chunk = []
+        yield ''.join(chunk) + ']}'
+
+    return StreamingHttpResponse(generate(), status=status, content_type='application/json')
+
+
+async def amap(function, rows):
+    async for row in rows:
+        yield function(row)
+
+
+def astream_envelope(envelope, rows, status=200):
+    # Same as stream_envelope for async views; ``rows`` is an async iterator,
+    # e.g. from ``queryset.aiterator(chunk_size=...)``.
+    chunk_size = settings.STREAMING_CHUNK_SIZE
+
+    async def generate():
+        head = json.dumps(envelope, cls=JSONEncoder)
+        yield head[:-1] + (', ' if envelope else '') + '"data": ['
+        chunk, separator = [], ''
+        async for row in rows:
+            chunk.append(separator + json.dumps(row, cls=JSONEncoder))
+            separator = ','
+            if len(chunk) == chunk_size:
+                yield ''.join(chunk)
+                chunk = []
+        yield ''.join(chunk) + ']}'
+
+    return StreamingHttpResponse(generate(), status=status, content_type='application/json')
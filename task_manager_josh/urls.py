@@ -17,8 +17,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from .views import DatabaseStats, Metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/users/', include('users.urls')),
     path('api/tasks/', include('tasks.urls')),
+    path('api/stats/database/', DatabaseStats.as_view(), name='database-stats'),
+    path('metrics/', Metrics.as_view(), name='metrics'),
 ]
@@ -0,0 +1,26 @@
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .db_connections import get_connection_stats
+from .metrics import IsMetricsClient, render_prometheus
+
+
+class DatabaseStats(APIView):
+    permission_classes = [IsAdminUser]
+    def get(self, request):
+        return Response({
+            "success": True,
+            "status": 200,
+            "message": "Database connection stats fetched successfully",
+            "data": get_connection_stats()
+        }, status=status.HTTP_200_OK)
+
+
+class Metrics(APIView):
+    authentication_classes = []
+    permission_classes = [IsMetricsClient]
+    def get(self, request):
+        return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
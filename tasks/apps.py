@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'tasks' 
\ No newline at end of file
+    name = 'tasks'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from task_manager_josh import slow_queries  # noqa: F401
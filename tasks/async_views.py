@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from task_manager_josh.async_api import AsyncAPIView
+from task_manager_josh.pagination import apaginate_keyset, get_page_size, pagination_requested
+from task_manager_josh.streaming import amap, astream_envelope, streaming_requested
+
+from .counters import aget_assignment_counts
+from .filters import filter_user_tasks, get_user_id_param, get_user_task_ordering
+from .models import Task, UserTask
+from .task_cache import aget_active_task
+from .versions import atasks_etag, auser_tasks_etag
+from .views import TASK_LIST_ORDERING, task_data, task_list_data, user_task_data
+
+
+class AsyncFetchAllTasks(AsyncAPIView):
+    permission_codename = 'fetch_task'
+    replica_reads = True
+    etag_func = staticmethod(atasks_etag)
+
+    async def get(self, request):
+        id = request.query_params.get('id')
+        if id is not None:
+            try:
+                task = await aget_active_task(id)
+            except Task.DoesNotExist:
+                return {
+                    "success": False,
+                    "status": 404,
+                    "message": "Task not found"
+                }, 404
+            return {
+                "success": True,
+                "status": 200,
+                "message": "Task fetched successfully",
+                "data": {**task_data(task), "assignments": await aget_assignment_counts(task.id)}
+            }, 200
+
+        tasks = Task.objects.filter(is_active=True).select_related('assignment_counts')
+        if streaming_requested(request):
+            return astream_envelope({
+                "success": True,
+                "status": 200,
+                "message": "Tasks fetched successfully"
+            }, amap(task_list_data, tasks.order_by(*TASK_LIST_ORDERING).aiterator(chunk_size=settings.STREAMING_CHUNK_SIZE)))
+
+        next_cursor = None
+        if pagination_requested(request):
+            tasks, next_cursor = await apaginate_keyset(
+                tasks, TASK_LIST_ORDERING,
+                cursor=request.query_params.get('cursor'),
+                page_size=get_page_size(request),
+            )
+        else:
+            tasks = [task async for task in tasks.order_by(*TASK_LIST_ORDERING)]
+        return {
+            "success": True,
+            "status": 200,
+            "message": "Tasks fetched successfully",
+            "data": [task_list_data(task) for task in tasks],
+            "next": next_cursor
+        }, 200
+
+
+class AsyncUserTasks(AsyncAPIView):
+    permission_codename = 'fetch_task'
+    replica_reads = True
+    etag_func = staticmethod(auser_tasks_etag)
+
+    async def get(self, request):
+        user_id = get_user_id_param(request.query_params, None)
+
+        if user_id is None:
+            user_id = request.user.id
+        elif not await get_user_model().objects.filter(id=user_id).aexists():
+            return {
+                "success": False,
+                "status": 404,
+                "message": "User not found"
+            }, 404
+
+        user_tasks = UserTask.objects.filter(user_id=user_id).select_related('task').only(
+            'id', 'status', 'assigned_at', 'completed_at',
+            'task__id', 'task__name', 'task__description', 'task__created_at', 'task__task_type', 'task__is_active',
+        )
+        user_tasks = filter_user_tasks(user_tasks, request.query_params)
+        ordering = get_user_task_ordering(request.query_params)
+        if streaming_requested(request):
+            return astream_envelope({
+                "success": True,
+                "status": 200,
+                "message": "Tasks fetched successfully"
+            }, amap(user_task_data, user_tasks.order_by(*ordering).aiterator(chunk_size=settings.STREAMING_CHUNK_SIZE)))
+
+        next_cursor = None
+        if pagination_requested(request):
+            user_tasks, next_cursor = await apaginate_keyset(
+                user_tasks, ordering,
+                cursor=request.query_params.get('cursor'),
+                page_size=get_page_size(request),
+            )
+        else:
+            user_tasks = [user_task async for user_task in user_tasks.order_by(*ordering)]
+        return {
+            "success": True,
+            "status": 200,
+            "message": "Tasks fetched successfully",
+            "data": [user_task_data(user_task) for user_task in user_tasks],
+            "next": next_cursor
+        }, 200
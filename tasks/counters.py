@@ -0,0 +1,82 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import TaskAssignmentCounts, UserTask
+from .versions import TASK_COUNTS_SCOPE, bump_versions
+
+STATUSES = [status for status, _ in UserTask.STATUS_CHOICES]
+
+
+def adjust_assignment_counts(deltas, create_missing=True):
+    """
+    Applies ``{task_id: {status: delta}}`` to the per-task counters with
+    atomic ``F()`` updates, one UPDATE per distinct set of deltas. Callers
+    bump TASK_COUNTS_SCOPE together with their other change versions.
+    """
+    groups = defaultdict(list)
+    for task_id, changes in deltas.items():
+        key = tuple(sorted((status, delta) for status, delta in changes.items() if delta))
+        if key:
+            groups[key].append(task_id)
+    if not groups:
+        return
+
+    if create_missing:
+        TaskAssignmentCounts.objects.bulk_create(
+            [TaskAssignmentCounts(task_id=task_id) for task_id in sorted(deltas)], ignore_conflicts=True
+        )
+    for key, task_ids in groups.items():
+        TaskAssignmentCounts.objects.filter(task_id__in=task_ids).update(
+            **{status: F(status) + delta for status, delta in key}
+        )
+
+
+def record_transitions(transitions):
+    # transitions: iterable of (task_id, previous status, new status). The
+    # counters row already exists, since it was created with the assignment.
+    deltas = defaultdict(lambda: defaultdict(int))
+    for task_id, previous_status, new_status in transitions:
+        deltas[task_id][previous_status] -= 1
+        deltas[task_id][new_status] += 1
+    adjust_assignment_counts(deltas, create_missing=False)
+
+
+def get_assignment_counts(task_id):
+    counts = TaskAssignmentCounts.objects.filter(task_id=task_id).first()
+    return counts.as_dict() if counts else dict.fromkeys(STATUSES, 0)
+
+
+async def aget_assignment_counts(task_id):
+    counts = await TaskAssignmentCounts.objects.filter(task_id=task_id).afirst()
+    return counts.as_dict() if counts else dict.fromkeys(STATUSES, 0)
+
+
+@transaction.atomic
+def recompute_assignment_counts(task_ids=None, batch_size=1000):
+    """
+    Rebuilds the counters from UserTask, for every task or only ``task_ids``.
+    Returns the number of tasks that have assignments.
+    """
+    user_tasks = UserTask.objects.all()
+    counts = TaskAssignmentCounts.objects.all()
+    if task_ids is not None:
+        user_tasks = user_tasks.filter(task_id__in=task_ids)
+        counts = counts.filter(task_id__in=task_ids)
+
+    rows = user_tasks.values('task_id').annotate(
+        **{status: Count('id', filter=Q(status=status)) for status in STATUSES}
+    ).order_by('task_id')
+    counts.delete()
+    created = 0
+    batch = []
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(TaskAssignmentCounts(**row))
+        if len(batch) == batch_size:
+            TaskAssignmentCounts.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    TaskAssignmentCounts.objects.bulk_create(batch)
+    bump_versions(TASK_COUNTS_SCOPE)
+    return created + len(batch)
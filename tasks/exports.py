@@ -0,0 +1,140 @@
+import csv
+import gzip
+import json
+import os
+import random
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .filters import filter_tasks, filter_user_tasks, filter_users
+from .models import Export, Task, UserTask
+
+# kind -> ((column, field), ...); the export reads only these fields.
+EXPORT_COLUMNS = {
+    'tasks': (
+        ('id', 'id'), ('name', 'name'), ('description', 'description'), ('created_at', 'created_at'),
+        ('task_type', 'task_type'), ('is_active', 'is_active'),
+    ),
+    'user_tasks': (
+        ('id', 'id'), ('user_id', 'user_id'), ('user_email', 'user__email'), ('task_id', 'task_id'),
+        ('task_name', 'task__name'), ('status', 'status'), ('assigned_at', 'assigned_at'), ('completed_at', 'completed_at'),
+    ),
+    'users': (
+        ('id', 'id'), ('email', 'email'), ('name', 'name'), ('mobile', 'mobile'), ('is_active', 'is_active'),
+        ('date_joined', 'date_joined'),
+    ),
+}
+# kind -> filters accepted in the export request
+EXPORT_FILTERS = {
+    'tasks': ('task_type', 'is_active', 'created_after', 'created_before'),
+    'user_tasks': (
+        'user_id', 'status', 'task_type', 'is_active',
+        'assigned_after', 'assigned_before', 'completed_after', 'completed_before',
+    ),
+    'users': ('is_active', 'joined_after', 'joined_before'),
+}
+
+
+def export_queryset(kind, filters, using=DEFAULT_DB_ALIAS):
+    """The rows of an export, as value tuples in EXPORT_COLUMNS order; raises ValidationError on bad filters."""
+    unknown = sorted(set(filters) - set(EXPORT_FILTERS[kind]))
+    if unknown:
+        raise ValidationError(f"Unknown filters for a {kind} export: {', '.join(unknown)}")
+    if kind == 'tasks':
+        queryset = filter_tasks(Task.objects.using(using), filters)
+    elif kind == 'users':
+        queryset = filter_users(get_user_model().objects.using(using), filters)
+    else:
+        queryset = UserTask.objects.using(using)
+        if filters.get('user_id'):
+            try:
+                queryset = queryset.filter(user_id=int(filters['user_id']))
+            except ValueError:
+                raise ValidationError("user_id must be an integer")
+        queryset = filter_user_tasks(queryset, filters)
+    return queryset.order_by('id').values_list(*(field for _, field in EXPORT_COLUMNS[kind]))
+
+
+def create_export(user, kind, export_format, filters):
+    if kind not in EXPORT_COLUMNS:
+        raise ValidationError(f"Invalid kind. Must be one of: {', '.join(EXPORT_COLUMNS)}")
+    formats = [choice[0] for choice in Export.FORMAT_CHOICES]
+    if export_format not in formats:
+        raise ValidationError(f"Invalid format. Must be one of: {', '.join(formats)}")
+    if not isinstance(filters, dict):
+        raise ValidationError("filters must be an object")
+    filters = {name: str(value) for name, value in filters.items()}
+    # Builds the query once so bad filters are rejected now, not by the worker.
+    export_queryset(kind, filters)
+    # By id: with stateless JWT authentication the user is not a User instance.
+    return Export.objects.create(requested_by_id=user.id, kind=kind, format=export_format, filters=filters)
+
+
+def export_path(export):
+    return os.path.join(settings.EXPORT_DIR, f'{export.id}.{export.format}.gz')
+
+
+def export_filename(export):
+    return f'{export.kind}-{export.created_at:%Y%m%d-%H%M%S}.{export.format}.gz'
+
+
+def claim_next_export():
+    """Moves the oldest pending export to running and returns it; None when there is none to claim."""
+    candidates = Export.objects.filter(status='pending').order_by('created_at').values_list('id', flat=True)[:10]
+    for export_id in candidates:
+        # Only one worker's conditional update matches.
+        if Export.objects.filter(id=export_id, status='pending').update(status='running', started_at=timezone.now()):
+            return Export.objects.get(id=export_id)
+    return None
+
+
+def _write_rows(file, export, rows):
+    columns = [column for column, _ in EXPORT_COLUMNS[export.kind]]
+    if export.format == 'csv':
+        writer = csv.writer(file)
+        writer.writerow(columns)
+
+        def write(row):
+            writer.writerow(value.isoformat() if hasattr(value, 'isoformat') else value for value in row)
+    else:
+        def write(row):
+            file.write(json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n')
+
+    count = 0
+    for row in rows:
+        write(row)
+        count += 1
+        if count % settings.EXPORT_PROGRESS_EVERY == 0:
+            Export.objects.filter(id=export.id).update(rows=count)
+    return count
+
+
+def run_export(export):
+    """
+    Writes a claimed export to EXPORT_DIR as a gzip file, reading a replica
+    when one is configured. Rows are streamed from a server-side cursor (on
+    PostgreSQL) in EXPORT_CHUNK_SIZE batches, so memory stays flat however
+    many rows there are.
+    """
+    using = random.choice(settings.DATABASE_REPLICAS) if settings.DATABASE_REPLICAS else DEFAULT_DB_ALIAS
+    path = export_path(export)
+    partial = path + '.part'
+    os.makedirs(settings.EXPORT_DIR, exist_ok=True)
+    try:
+        rows = export_queryset(export.kind, export.filters, using).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+        with gzip.open(partial, 'wt', encoding='utf-8', newline='') as file:
+            count = _write_rows(file, export, rows)
+        os.replace(partial, path)
+    except Exception as e:
+        if os.path.exists(partial):
+            os.remove(partial)
+        Export.objects.filter(id=export.id).update(status='failed', error=str(e), finished_at=timezone.now())
+        raise
+    Export.objects.filter(id=export.id).update(
+        status='completed', rows=count, size=os.path.getsize(path), finished_at=timezone.now()
+    )
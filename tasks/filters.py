@@ -0,0 +1,135 @@
+import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import Task, UserTask
+
+USER_TASK_SORTS = {
+    'assigned_at': ('assigned_at', 'id'),
+    '-assigned_at': ('-assigned_at', '-id'),
+    'created_at': ('task__created_at', 'id'),
+    '-created_at': ('-task__created_at', '-id'),
+}
+
+# query parameter -> (lookup, is upper bound)
+USER_TASK_DATE_RANGES = {
+    'assigned_after': ('assigned_at__gte', False),
+    'assigned_before': ('assigned_at__lte', True),
+    'completed_after': ('completed_at__gte', False),
+    'completed_before': ('completed_at__lte', True),
+}
+TASK_DATE_RANGES = {
+    'created_after': ('created_at__gte', False),
+    'created_before': ('created_at__lte', True),
+}
+USER_DATE_RANGES = {
+    'joined_after': ('date_joined__gte', False),
+    'joined_before': ('date_joined__lte', True),
+}
+
+
+def _parse_choices(params, name, choices):
+    value = params.get(name)
+    if not value:
+        return None
+    values = value.split(',')
+    valid = [choice[0] for choice in choices]
+    invalid = [v for v in values if v not in valid]
+    if invalid:
+        raise ValidationError(f"Invalid {name}. Must be one of: {', '.join(valid)}")
+    return values
+
+
+def _parse_bool(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+    if value.lower() in ('true', '1', 'yes'):
+        return True
+    if value.lower() in ('false', '0', 'no'):
+        return False
+    raise ValidationError(f"{name} must be true or false")
+
+
+def _parse_moment(params, name, upper):
+    value = params.get(name)
+    if not value:
+        return None
+    error = ValidationError(f"{name} must be an ISO 8601 date or datetime")
+    try:
+        moment = parse_datetime(value)
+        day = parse_date(value) if moment is None else None
+    except ValueError:
+        raise error
+    if moment is None:
+        if day is None:
+            raise error
+        # A bare date covers the whole day when used as an upper bound.
+        moment = datetime.datetime.combine(day, datetime.time.max if upper else datetime.time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def filter_user_tasks(queryset, params):
+    statuses = _parse_choices(params, 'status', UserTask.STATUS_CHOICES)
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+
+    task_types = _parse_choices(params, 'task_type', Task.TASK_TYPE_CHOICES)
+    if task_types:
+        queryset = queryset.filter(task__task_type__in=task_types)
+
+    is_active = _parse_bool(params, 'is_active')
+    if is_active is not None:
+        queryset = queryset.filter(task__is_active=is_active)
+
+    return _filter_date_ranges(queryset, params, USER_TASK_DATE_RANGES)
+
+
+def filter_tasks(queryset, params):
+    task_types = _parse_choices(params, 'task_type', Task.TASK_TYPE_CHOICES)
+    if task_types:
+        queryset = queryset.filter(task_type__in=task_types)
+
+    is_active = _parse_bool(params, 'is_active')
+    if is_active is not None:
+        queryset = queryset.filter(is_active=is_active)
+
+    return _filter_date_ranges(queryset, params, TASK_DATE_RANGES)
+
+
+def filter_users(queryset, params):
+    is_active = _parse_bool(params, 'is_active')
+    if is_active is not None:
+        queryset = queryset.filter(is_active=is_active)
+
+    return _filter_date_ranges(queryset, params, USER_DATE_RANGES)
+
+
+def _filter_date_ranges(queryset, params, ranges):
+    for name, (lookup, upper) in ranges.items():
+        moment = _parse_moment(params, name, upper)
+        if moment is not None:
+            queryset = queryset.filter(**{lookup: moment})
+    return queryset
+
+
+def get_user_id_param(params, default):
+    """``?user_id=`` as an int, so "05" and "5" name the same user; ``default`` when absent."""
+    user_id = params.get('user_id')
+    if not user_id:
+        return default
+    try:
+        return int(user_id)
+    except ValueError:
+        raise ValidationError("user_id must be an integer")
+
+
+def get_user_task_ordering(params):
+    sort = params.get('sort', 'assigned_at')
+    if sort not in USER_TASK_SORTS:
+        raise ValidationError(f"Invalid sort. Must be one of: {', '.join(USER_TASK_SORTS)}")
+    return USER_TASK_SORTS[sort]
@@ -0,0 +1,215 @@
+import csv
+import io
+import json
+import os
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .counters import STATUSES
+from .models import Task, TaskAssignmentCounts, UserTask
+from .serializers import TaskSerializer
+from .versions import TASK_COUNTS_SCOPE, TASKS_SCOPE, bump_versions, user_tasks_scope
+
+IMPORT_FORMATS = {
+    '.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson',
+    'text/csv': 'csv', 'application/x-ndjson': 'ndjson', 'application/jsonl': 'ndjson',
+}
+TASK_COLUMNS = ('id', 'name', 'description', 'created_at', 'task_type', 'is_active')
+USER_TASK_COLUMNS = ('user_id', 'task_id', 'status', 'assigned_at', 'completed_at')
+
+
+def parse_rows(file, file_format):
+    """
+    Yields ``(line, row)`` from lines of text in CSV (with a header row) or
+    NDJSON, one row at a time; a line that is not a JSON object yields
+    ``(line, None)``.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line, text in enumerate(file, 1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError:
+            row = None
+        yield line, row if isinstance(row, dict) else None
+
+
+def import_format(name):
+    """'csv' or 'ndjson' for a file name (ignoring a .gz suffix) or content type; None if unknown."""
+    name = (name or '').lower().split(';')[0].strip().removesuffix('.gz')
+    return IMPORT_FORMATS.get(name) or IMPORT_FORMATS.get(os.path.splitext(name)[1])
+
+
+def _assignees(row):
+    # "a@x.com; b@x.com" in CSV, a list or the same string in NDJSON.
+    value = row.get('assignees') or []
+    if isinstance(value, str):
+        value = value.replace(',', ';').split(';')
+    return list(dict.fromkeys(str(email).strip().lower() for email in value if str(email).strip()))
+
+
+class TaskImporter:
+    """
+    Loads tasks, and optionally their assignments, from parsed rows in
+    batches of IMPORT_BATCH_SIZE. Each row is a task validated with
+    TaskSerializer; its ``assignees`` (emails) become UserTask rows in
+    ``status`` (default open). Invalid rows and unknown emails are rejected
+    without stopping the import. Every batch is written in one transaction,
+    with COPY on PostgreSQL and bulk_create elsewhere, and the assignment
+    counters and change versions are kept in step.
+    """
+
+    def __init__(self, allow_assignments=True, use_copy=None, batch_size=None, on_progress=None, on_reject=None):
+        self.allow_assignments = allow_assignments
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        use_copy = settings.IMPORT_USE_COPY if use_copy is None else use_copy
+        self.use_copy = use_copy and connections[DEFAULT_DB_ALIAS].vendor == 'postgresql'
+        self.on_progress = on_progress
+        self.on_reject = on_reject
+        self.user_ids = {}
+        # One instance validates every row, as a ListSerializer's child does;
+        # building a serializer's fields costs more than validating a row.
+        self.serializer = TaskSerializer()
+        self.report = {'rows': 0, 'tasks': 0, 'assignments': 0, 'rejected': 0, 'seconds': 0.0, 'rows_per_second': 0.0,
+                       'rejects': []}
+
+    def run(self, rows):
+        start = time.perf_counter()
+        rows = iter(rows)
+        while batch := list(islice(rows, self.batch_size)):
+            self._load_batch(batch)
+            self.report['seconds'] = round(time.perf_counter() - start, 3)
+            self.report['rows_per_second'] = round(self.report['rows'] / (self.report['seconds'] or 1e-9), 1)
+            if self.on_progress:
+                self.on_progress(self.report)
+        self.report['rejects'].sort(key=lambda reject: reject['line'])
+        return self.report
+
+    def _reject(self, line, errors):
+        self.report['rejected'] += 1
+        reject = {'line': line, 'errors': errors}
+        if len(self.report['rejects']) < settings.IMPORT_MAX_REPORTED_REJECTS:
+            self.report['rejects'].append(reject)
+        if self.on_reject:
+            self.on_reject(reject)
+
+    def _resolve_users(self, emails):
+        # One query per batch for the emails not seen in earlier batches.
+        # Emails are compared lowercased, as _assignees lowercases them.
+        missing = [email for email in emails if email not in self.user_ids]
+        if missing:
+            self.user_ids.update(dict.fromkeys(missing))
+            self.user_ids.update(
+                get_user_model().objects.annotate(email_lower=Lower('email'))
+                .filter(email_lower__in=missing).values_list('email_lower', 'id')
+            )
+
+    def _load_batch(self, batch):
+        self.report['rows'] += len(batch)
+        candidates = []
+        for line, row in batch:
+            if row is None:
+                self._reject(line, {'row': ["Not a JSON object"]})
+                continue
+            # Empty CSV fields fall back to the model defaults.
+            data = {key: value for key, value in row.items() if key in TASK_COLUMNS and value not in ('', None)}
+            try:
+                validated_data = self.serializer.run_validation(data)
+            except ValidationError as e:
+                self._reject(line, e.detail)
+                continue
+            assignees = _assignees(row)
+            assignment_status = row.get('status') or 'open'
+            if assignees and not self.allow_assignments:
+                self._reject(line, {'assignees': ["Assigning tasks requires the assign_task permission"]})
+                continue
+            if assignment_status not in STATUSES:
+                self._reject(line, {'status': [f"Must be one of: {', '.join(STATUSES)}"]})
+                continue
+            candidates.append((line, validated_data, assignees, assignment_status))
+
+        self._resolve_users({email for _, _, assignees, _ in candidates for email in assignees})
+        valid = []
+        for line, data, assignees, assignment_status in candidates:
+            unknown = [email for email in assignees if self.user_ids.get(email) is None]
+            if unknown:
+                self._reject(line, {'assignees': [f"Unknown users: {', '.join(unknown)}"]})
+                continue
+            valid.append((data, [self.user_ids[email] for email in assignees], assignment_status))
+        if valid:
+            self._write(valid)
+
+    @transaction.atomic
+    def _write(self, valid):
+        now = timezone.now()
+        tasks = [Task(created_at=now, **data) for data, _, _ in valid]
+        if self.use_copy:
+            self._copy_tasks(tasks)
+        else:
+            Task.objects.bulk_create(tasks, batch_size=settings.TASK_BATCH_CHUNK_SIZE)
+
+        user_tasks, counts, user_ids = [], [], set()
+        for task, (_, assignee_ids, assignment_status) in zip(tasks, valid):
+            if not assignee_ids:
+                continue
+            completed_at = now if assignment_status == 'completed' else None
+            user_tasks += [
+                UserTask(user_id=user_id, task_id=task.id, status=assignment_status, assigned_at=now, completed_at=completed_at)
+                for user_id in assignee_ids
+            ]
+            # The tasks are new, so their counters rows are created outright.
+            counts.append(TaskAssignmentCounts(task_id=task.id, **{assignment_status: len(assignee_ids)}))
+            user_ids.update(assignee_ids)
+        if user_tasks:
+            if self.use_copy:
+                self._copy(UserTask, USER_TASK_COLUMNS, [[getattr(ut, c) for c in USER_TASK_COLUMNS] for ut in user_tasks])
+            else:
+                UserTask.objects.bulk_create(user_tasks, batch_size=settings.TASK_BATCH_CHUNK_SIZE)
+            TaskAssignmentCounts.objects.bulk_create(counts, batch_size=settings.TASK_BATCH_CHUNK_SIZE)
+
+        bump_versions(TASKS_SCOPE, *([TASK_COUNTS_SCOPE] if user_tasks else []), *map(user_tasks_scope, user_ids))
+        self.report['tasks'] += len(tasks)
+        self.report['assignments'] += len(user_tasks)
+
+    def _copy_tasks(self, tasks):
+        # COPY returns no ids, so they are drawn from the table's sequence first.
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                [Task._meta.db_table, len(tasks)],
+            )
+            for task, (task_id,) in zip(tasks, cursor.fetchall()):
+                task.id = task_id
+        self._copy(Task, TASK_COLUMNS, [[getattr(task, c) for c in TASK_COLUMNS] for task in tasks])
+
+    def _copy(self, model, columns, rows):
+        connection = connections[DEFAULT_DB_ALIAS]
+        quote = connection.ops.quote_name
+        sql = f"COPY {quote(model._meta.db_table)} ({', '.join(map(quote, columns))}) FROM STDIN"
+        with connection.cursor() as cursor:
+            if hasattr(cursor.cursor, 'copy'):
+                # psycopg 3
+                with cursor.cursor.copy(sql) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+                return
+            # psycopg2: CSV, where an unquoted empty field is NULL.
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow('' if value is None else value.isoformat() if hasattr(value, 'isoformat') else value
+                                for value in row)
+            buffer.seek(0)
+            cursor.cursor.copy_expert(f"{sql} WITH (FORMAT csv)", buffer)
@@ -0,0 +1,61 @@
+import gzip
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.imports import TaskImporter, import_format, parse_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports tasks, and their assignments, from a CSV or NDJSON file (optionally gzipped). "
+        "Rows that fail validation are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import; the format is taken from its extension.")
+        parser.add_argument('--format', choices=('csv', 'ndjson'), help="Overrides the format from the extension.")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Rows per transaction; defaults to IMPORT_BATCH_SIZE.")
+        parser.add_argument('--rejects', help="Write every rejected row's line and errors to this file as NDJSON.")
+        parser.add_argument('--no-copy', action='store_true', help="Use bulk inserts instead of COPY on PostgreSQL.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or import_format(path)
+        if file_format is None:
+            raise CommandError("Unknown file format; pass --format csv or --format ndjson")
+        opener = gzip.open if path.endswith('.gz') else open
+        rejects = open(options['rejects'], 'w') if options['rejects'] else None
+
+        def on_progress(report):
+            self.stdout.write(
+                f"{report['rows']} rows: {report['tasks']} tasks, {report['assignments']} assignments, "
+                f"{report['rejected']} rejected ({report['rows_per_second']:.0f} rows/s)"
+            )
+
+        def on_reject(reject):
+            if rejects:
+                rejects.write(json.dumps(reject) + '\n')
+
+        importer = TaskImporter(
+            use_copy=False if options['no_copy'] else None,
+            batch_size=options['batch_size'],
+            on_progress=on_progress,
+            on_reject=on_reject,
+        )
+        try:
+            with opener(path, 'rt', encoding='utf-8-sig', newline='') as f:
+                report = importer.run(parse_rows(f, file_format))
+        except OSError as e:
+            raise CommandError(e)
+        finally:
+            if rejects:
+                rejects.close()
+
+        for reject in report['rejects'][:10]:
+            self.stderr.write(f"Line {reject['line']}: {json.dumps(reject['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['tasks']} tasks and {report['assignments']} assignments from {report['rows']} rows "
+            f"in {report['seconds']:.1f}s ({report['rows_per_second']:.0f} rows/s); {report['rejected']} rejected"
+        ))
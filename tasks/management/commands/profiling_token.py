@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from task_manager_josh.profiling import make_profile_token
+
+
+class Command(BaseCommand):
+    help = "Prints a signed X-Profile-Token header value that makes ProfilingMiddleware profile a request."
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_profile_token())
@@ -0,0 +1,63 @@
+import datetime
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+
+from task_manager_josh.slow_queries import fingerprint, read_slow_queries
+
+WINDOW_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days'}
+SORT_KEYS = ('total', 'count', 'max', 'mean')
+
+
+def parse_window(value):
+    match = re.fullmatch(r'(\d+)([mhd])', value)
+    if not match:
+        raise CommandError(f"Invalid --since {value!r}; use e.g. 30m, 6h or 7d")
+    return datetime.timedelta(**{WINDOW_UNITS[match.group(2)]: int(match.group(1))})
+
+
+class Command(BaseCommand):
+    help = "Ranks the statement fingerprints in the slow query log by total, count, max or mean time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', default='24h', help="Time window, e.g. 30m, 6h or 7d (default 24h).")
+        parser.add_argument('--sort', choices=SORT_KEYS, default='total')
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--log', help="Slow query log to read; defaults to SLOW_QUERY_LOG.")
+        parser.add_argument('--plans', action='store_true', help="Print the latest captured plan of each fingerprint.")
+
+    def handle(self, *args, **options):
+        since = datetime.datetime.now(datetime.timezone.utc) - parse_window(options['since'])
+        groups = {}
+        for entry in read_slow_queries(since, options['log']):
+            group = groups.setdefault(entry['fingerprint'], {
+                'count': 0, 'total': 0.0, 'max': 0.0, 'sql': entry['sql'], 'views': {}, 'frames': {}, 'plan': None,
+            })
+            group['count'] += 1
+            group['total'] += entry['ms']
+            if entry['ms'] >= group['max']:
+                group['max'] = entry['ms']
+                group['sql'] = entry['sql']
+            for field, key in (('views', 'view'), ('frames', 'frame')):
+                if entry[key]:
+                    group[field][entry[key]] = group[field].get(entry[key], 0) + 1
+            group['plan'] = entry['plan'] or group['plan']
+        if not groups:
+            self.stdout.write(f"No slow queries in the last {options['since']}")
+            return
+
+        for group in groups.values():
+            group['mean'] = group['total'] / group['count']
+        ranked = sorted(groups.items(), key=lambda item: item[1][options['sort']], reverse=True)[:options['limit']]
+        for rank, (key, group) in enumerate(ranked, 1):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"\n{rank}. {key}: {group['count']} x, total {group['total']:.0f} ms, "
+                f"mean {group['mean']:.1f} ms, max {group['max']:.1f} ms"
+            ))
+            self.stdout.write(f"   {fingerprint(group['sql'])[:500]}")
+            for field, label in (('views', 'view'), ('frames', 'frame')):
+                top = sorted(group[field].items(), key=lambda item: item[1], reverse=True)[:3]
+                if top:
+                    self.stdout.write(f"   {label}: " + ', '.join(f"{name} ({count})" for name, count in top))
+            if options['plans'] and group['plan']:
+                self.stdout.write('   ' + group['plan'].replace('\n', '\n   '))
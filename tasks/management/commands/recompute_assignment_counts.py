@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from tasks.counters import recompute_assignment_counts
+
+
+class Command(BaseCommand):
+    help = "Recomputes the per-task assignment counters from UserTask."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--task-id', type=int, action='append', dest='task_ids',
+                            help="Only recompute this task; can be repeated.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = recompute_assignment_counts(options['task_ids'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed assignment counts for {count} tasks"))
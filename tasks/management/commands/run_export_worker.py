@@ -0,0 +1,68 @@
+import logging
+import multiprocessing
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+logger = logging.getLogger('tasks.exports')
+
+
+def work(settings_module, poll_interval, once):
+    # Runs in a child process; with the spawn start method it must set up
+    # Django itself before touching models.
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+    from tasks.exports import claim_next_export, run_export
+
+    while True:
+        export = claim_next_export()
+        if export is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+        try:
+            run_export(export)
+        except Exception:
+            logger.exception("Export %s failed", export.id)
+
+
+class Command(BaseCommand):
+    help = "Runs a pool of worker processes that write pending exports to EXPORT_DIR."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None, help="Worker processes; defaults to EXPORT_WORKERS.")
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help="Seconds an idle worker waits before looking again; defaults to EXPORT_POLL_INTERVAL.")
+        parser.add_argument('--once', action='store_true', help="Exit once no pending exports are left.")
+        parser.add_argument('--requeue-running', action='store_true',
+                            help="First return exports left running by a stopped worker to pending.")
+
+    def handle(self, *args, **options):
+        # Not at module level: spawned workers import this module before Django is set up.
+        from tasks.models import Export
+
+        if options['requeue_running']:
+            count = Export.objects.filter(status='running').update(status='pending', started_at=None)
+            self.stdout.write(f"Requeued {count} running exports")
+        processes = options['processes'] or settings.EXPORT_WORKERS
+        poll_interval = options['poll_interval'] or settings.EXPORT_POLL_INTERVAL
+        # Forked children must not share the parent's database connections.
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=work, args=(settings.SETTINGS_MODULE, poll_interval, options['once']))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {processes} export workers")
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
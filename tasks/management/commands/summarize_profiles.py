@@ -0,0 +1,67 @@
+import glob
+import io
+import json
+import os
+import pstats
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Merges the per-process request profiles written by ProfilingMiddleware and prints the hottest functions per view."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=None, help="Profile directory; defaults to PROFILING_DIR.")
+        parser.add_argument('--view', action='append', dest='views',
+                            help="Only summarize this URL name; can be repeated.")
+        parser.add_argument('--sort', default='cumulative', help="pstats sort key, e.g. cumulative or tottime.")
+        parser.add_argument('--limit', type=int, default=20, help="Functions listed per view.")
+        parser.add_argument('--output', help="Write the merged <view>.prof and <view>.collapsed files here.")
+
+    def handle(self, *args, **options):
+        directory = options['dir'] or settings.PROFILING_DIR
+        if not os.path.isdir(directory):
+            raise CommandError(f"No profiles in {directory}")
+        views = sorted(
+            name for name in os.listdir(directory)
+            if glob.glob(os.path.join(directory, name, '*.prof'))
+            and (not options['views'] or name in options['views'])
+        )
+        if not views:
+            raise CommandError(f"No matching profiles in {directory}")
+        if options['output']:
+            os.makedirs(options['output'], exist_ok=True)
+
+        for view in views:
+            base = os.path.join(directory, view)
+            report = io.StringIO()
+            stats = pstats.Stats(*sorted(glob.glob(os.path.join(base, '*.prof'))), stream=report)
+            requests, wall_ms = 0, 0.0
+            for path in glob.glob(os.path.join(base, '*.json')):
+                with open(path) as f:
+                    totals = json.load(f)
+                requests += totals['requests']
+                wall_ms += totals['wall_ms']
+            average = f"{wall_ms / requests:.1f} ms" if requests else "n/a"
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"\n{view}: {requests} requests, {average} average, {stats.total_tt * 1000:.1f} ms profiled"
+            ))
+            stats.sort_stats(options['sort']).print_stats(options['limit'])
+            self.stdout.write(report.getvalue().rstrip())
+
+            if options['output']:
+                stats.dump_stats(os.path.join(options['output'], f'{view}.prof'))
+                stacks = Counter()
+                for path in glob.glob(os.path.join(base, '*.collapsed')):
+                    with open(path) as f:
+                        for line in f:
+                            stack, _, value = line.rstrip('\n').rpartition(' ')
+                            if stack:
+                                stacks[stack] += int(value)
+                with open(os.path.join(options['output'], f'{view}.collapsed'), 'w') as f:
+                    f.writelines(f'{stack} {value}\n' for stack, value in sorted(stacks.items()))
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f"\nMerged profiles written to {options['output']}"))
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_remove_task_assigned_users_remove_task_completed_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at', 'id'], name='task_active_created_idx'),
+        ),
+    ]
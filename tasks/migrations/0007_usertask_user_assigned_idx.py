@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_active_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usertask',
+            index=models.Index(fields=['user', 'assigned_at', 'id'], name='usertask_user_assigned_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:44
+
+import sys
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+# Which duplicate survives: the furthest along, then the earliest assigned.
+KEEP_ORDER = {'in_progress': 0, 'blocked': 1, 'open': 2}
+
+def remove_duplicate_active_assignments(apps, schema_editor):
+    # The old check-then-insert in AssignTask could create several
+    # not-completed rows for one (user, task) under concurrency; the
+    # constraint below cannot be added while they exist.
+    UserTask = apps.get_model('tasks', 'UserTask')
+    active = UserTask.objects.exclude(status='completed')
+    duplicates = active.values('user_id', 'task_id').annotate(n=Count('id')).filter(n__gt=1).order_by()
+    removed = []
+    for pair in duplicates:
+        rows = sorted(
+            active.filter(user_id=pair['user_id'], task_id=pair['task_id']).values('id', 'status'),
+            key=lambda row: (KEEP_ORDER.get(row['status'], len(KEEP_ORDER)), row['id']),
+        )
+        removed += [row['id'] for row in rows[1:]]
+    if removed:
+        UserTask.objects.filter(id__in=removed).delete()
+        sys.stdout.write(
+            f"\n  Removed {len(removed)} duplicate open assignments (UserTask ids: {', '.join(map(str, removed))})"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_usertask_user_assigned_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_active_assignments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='usertask',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'completed'), _negated=True), fields=('user', 'task'), name='usertask_one_active_assignment'),
+        ),
+    ]
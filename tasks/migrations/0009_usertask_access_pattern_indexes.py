@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_usertask_one_active_assignment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usertask',
+            index=models.Index(condition=models.Q(('status', 'completed'), _negated=True), fields=['user', 'assigned_at', 'id'], name='usertask_user_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usertask',
+            index=models.Index(fields=['user', 'status'], name='usertask_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usertask',
+            index=models.Index(fields=['task', 'status'], name='usertask_task_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usertask',
+            index=models.Index(fields=['user', 'task', 'status'], name='usertask_user_task_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:48
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_usertask_access_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeVersion',
+            fields=[
+                ('scope', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('version', models.UUIDField(default=uuid.uuid4)),
+                ('changed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
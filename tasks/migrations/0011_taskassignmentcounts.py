@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+STATUSES = ['open', 'in_progress', 'completed', 'blocked']
+
+def backfill_assignment_counts(apps, schema_editor):
+    UserTask = apps.get_model('tasks', 'UserTask')
+    TaskAssignmentCounts = apps.get_model('tasks', 'TaskAssignmentCounts')
+
+    rows = UserTask.objects.values('task_id').annotate(
+        **{status: Count('id', filter=Q(status=status)) for status in STATUSES}
+    ).order_by('task_id')
+    TaskAssignmentCounts.objects.bulk_create([TaskAssignmentCounts(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_changeversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskAssignmentCounts',
+            fields=[
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='assignment_counts', serialize=False, to='tasks.task')),
+                ('open', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('blocked', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_assignment_counts, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
-from django.db import models
+import uuid
+
+from django.db import connections, models, router
 from django.conf import settings
+from django.utils import timezone
 
 class Task(models.Model):
     TASK_TYPE_CHOICES = [
@@ -22,6 +25,12 @@ class Task(models.Model):
     # assigned_users = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='tasks')
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of the active task list (FetchAllTasks).
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_active=True), name='task_active_created_idx'),
+        ]
+
     def __str__(self):
         return self.name 
     
@@ -32,14 +41,171 @@ class UserTask(models.Model):
         ('completed', 'Completed'),
         ('blocked','Blocked')
     ]
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='user_tasks')
-    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='user_tasks')
+    # current status -> statuses it can move to; completed is terminal
+    STATUS_TRANSITIONS = {
+        'open': ('in_progress', 'blocked'),
+        'blocked': ('in_progress', 'open'),
+        'in_progress': ('completed', 'blocked'),
+        'completed': (),
+    }
+    # No single-column FK indexes: the (user, ...) and (task, status) indexes
+    # below lead with the same columns and serve the same lookups and cascades.
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='user_tasks', db_index=False)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='user_tasks', db_index=False)
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='open')
     assigned_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(blank=True, null=True)
     
-    # class Meta:
-    #     unique_together = ['user', 'task']  # Each user can have only one relationship with a task
-        
+    class Meta:
+        constraints = [
+            # A user can hold only one not-yet-completed assignment per task.
+            models.UniqueConstraint(
+                fields=['user', 'task'], condition=~models.Q(status='completed'), name='usertask_one_active_assignment'
+            ),
+        ]
+        indexes = [
+            # Per-user inbox listing (UserTasks) ordered by assignment time.
+            models.Index(fields=['user', 'assigned_at', 'id'], name='usertask_user_assigned_idx'),
+            # The same listing restricted to work still in flight, which is what clients poll.
+            models.Index(
+                fields=['user', 'assigned_at', 'id'], condition=~models.Q(status='completed'), name='usertask_user_open_idx'
+            ),
+            # UserTasks ?status= filters.
+            models.Index(fields=['user', 'status'], name='usertask_user_status_idx'),
+            # DeleteTask's pending-assignment check.
+            models.Index(fields=['task', 'status'], name='usertask_task_status_idx'),
+        ]
+
+    @classmethod
+    def statuses_moving_to(cls, new_status):
+        return [current for current, targets in cls.STATUS_TRANSITIONS.items() if new_status in targets]
+
+    @classmethod
+    def transition_error(cls, current_status, new_status):
+        if new_status in cls.STATUS_TRANSITIONS[current_status]:
+            return None
+        if not cls.STATUS_TRANSITIONS[current_status]:
+            return f"Cannot change status of a {current_status} task"
+        label = current_status.capitalize().replace('_', '-')
+        targets = " or ".join(f"'{target}'" for target in cls.STATUS_TRANSITIONS[current_status])
+        return f"{label} tasks can only be moved to {targets}"
+
+    @classmethod
+    def transition(cls, user_id, task_id, new_status):
+        """
+        Moves the user's assignment of a task to ``new_status`` with one
+        conditional ``UPDATE ... WHERE status IN (<statuses allowed to move
+        there>)``. Returns the updated row, with the task name as
+        ``task_name`` and the status it left as ``previous_status``, or None
+        when nothing matched.
+        """
+        using = router.db_for_write(cls)
+        connection = connections[using]
+        quote = connection.ops.quote_name
+        table, task_table = quote(cls._meta.db_table), quote(Task._meta.db_table)
+        expected = cls.statuses_moving_to(new_status)
+        if not expected:
+            return None
+        changes = ['status = %s']
+        params = [new_status]
+        if new_status == 'completed':
+            changes.append('completed_at = %s')
+            params.append(connection.ops.adapt_datetimefield_value(timezone.now()))
+        columns = ', '.join(f'{table}.{column}' for column in ('id', 'user_id', 'task_id', 'status', 'assigned_at', 'completed_at'))
+        task_name = f"(SELECT name FROM {task_table} WHERE {task_table}.id = {table}.task_id) AS task_name"
+        placeholders = ', '.join(['%s'] * len(expected))
+
+        if connection.vendor == 'postgresql':
+            # The CTE locks the row and reads the status it is leaving, so the
+            # previous status comes back from the same statement.
+            sql = (
+                f"WITH old AS (SELECT id, status FROM {table} "
+                f"WHERE user_id = %s AND task_id = %s AND status IN ({placeholders}) FOR UPDATE) "
+                f"UPDATE {table} SET {', '.join(changes)} FROM old WHERE {table}.id = old.id "
+                f"RETURNING {columns}, old.status AS previous_status, {task_name}"
+            )
+            rows = list(cls.objects.db_manager(using).raw(sql, [user_id, task_id, *expected, *params]))
+            return rows[0] if rows else None
+
+        # Elsewhere RETURNING cannot read the old row, so compare-and-swap
+        # each allowed status in turn.
+        sql = (
+            f"UPDATE {table} SET {', '.join(changes)} "
+            f"WHERE user_id = %s AND task_id = %s AND status = %s "
+            f"RETURNING {columns}, {task_name}"
+        )
+        for status in expected:
+            rows = list(cls.objects.db_manager(using).raw(sql, [*params, user_id, task_id, status]))
+            if rows:
+                rows[0].previous_status = status
+                return rows[0]
+        return None
+
+    def __str__(self):
+        return f"{self.user.email} - {self.task.name} - {self.status}"
+
+class TaskAssignmentCounts(models.Model):
+    # Denormalized number of assignments per status, kept in step with
+    # UserTask by tasks.counters and rebuilt by recompute_assignment_counts.
+    # A task without a row has no assignments.
+    task = models.OneToOneField(Task, on_delete=models.CASCADE, primary_key=True, related_name='assignment_counts')
+    open = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    blocked = models.IntegerField(default=0)
+
+    def as_dict(self):
+        return {status: getattr(self, status) for status, _ in UserTask.STATUS_CHOICES}
+
+    def __str__(self):
+        return f"{self.task_id} - {self.as_dict()}"
+
+class ChangeVersion(models.Model):
+    # One row per cached scope, e.g. "tasks" or "user_tasks:<user id>". The
+    # version is replaced on every write so readers can answer If-None-Match
+    # with a single primary key lookup.
+    scope = models.CharField(max_length=100, primary_key=True)
+    version = models.UUIDField(default=uuid.uuid4)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.scope} - {self.version}"
+
+class Export(models.Model):
+    # A requested file export, written by `manage.py run_export_worker`.
+    KIND_CHOICES = [
+        ('tasks', 'Tasks'),
+        ('user_tasks', 'User tasks'),
+        ('users', 'Users'),
+    ]
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('ndjson', 'NDJSON'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='exports')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    filters = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    rows = models.BigIntegerField(default=0)
+    size = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest pending export.
+            models.Index(fields=['created_at'], condition=models.Q(status='pending'), name='export_pending_idx'),
+        ]
+
     def __str__(self):
-        return f"{self.user.email} - {self.task.name} - {self.status}"
\ No newline at end of file
+        return f"{self.kind} export {self.id} - {self.status}"
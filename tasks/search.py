@@ -0,0 +1,70 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, Case, Exists, FloatField, OuterRef, Q, Value, When
+from django.db.models.expressions import RawSQL
+from rest_framework.exceptions import ValidationError
+
+from .models import Task, UserTask
+
+# Must match the text search configuration used by the search_vector trigger
+# (migration 0012).
+SEARCH_CONFIG = 'english'
+SEARCH_ORDERING = ('-rank', 'id')
+# Fallback ranking weights, after PostgreSQL's defaults for labels A and B.
+NAME_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+
+
+def parse_search_terms(query):
+    # Only word characters survive, so the terms are safe to splice into a tsquery.
+    terms = re.findall(r'\w+', query or '')
+    if not terms:
+        raise ValidationError("Search query is required")
+    return terms
+
+
+def _postgres_search(queryset, terms):
+    # Every term must match, each as a prefix: "rep bug" -> "rep:* & bug:*"
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    return queryset.alias(
+        matches=RawSQL(
+            'search_vector @@ to_tsquery(%s::regconfig, %s)', [SEARCH_CONFIG, tsquery], output_field=BooleanField()
+        ),
+    ).filter(matches=True).annotate(
+        # ts_rank is float4; as float8 the value survives the round trip
+        # through a keyset cursor, so rank = <cursor> still matches on ties.
+        rank=RawSQL(
+            'ts_rank(search_vector, to_tsquery(%s::regconfig, %s))::float8', [SEARCH_CONFIG, tsquery],
+            output_field=FloatField(),
+        ),
+    )
+
+
+def _fallback_search(queryset, terms):
+    # Substring matching, which also covers prefixes, ranked by where terms hit.
+    condition = Q()
+    rank = Value(0.0)
+    for term in terms:
+        condition &= Q(name__icontains=term) | Q(description__icontains=term)
+        rank = rank + Case(When(name__icontains=term, then=Value(NAME_WEIGHT)), default=Value(0.0)) \
+            + Case(When(description__icontains=term, then=Value(DESCRIPTION_WEIGHT)), default=Value(0.0))
+    return queryset.filter(condition).annotate(rank=rank)
+
+
+def search_tasks(query, user_id=None):
+    """
+    Active tasks whose name or description match every term of ``query``,
+    annotated with ``rank``; order by SEARCH_ORDERING. With ``user_id`` only
+    tasks assigned to that user are searched.
+
+    PostgreSQL uses the stored, GIN-indexed ``search_vector``; other databases
+    fall back to case-insensitive substring matching.
+    """
+    terms = parse_search_terms(query)
+    tasks = Task.objects.filter(is_active=True)
+    if user_id is not None:
+        tasks = tasks.filter(Exists(UserTask.objects.filter(user_id=user_id, task_id=OuterRef('pk'))))
+    if connections[tasks.db].vendor == 'postgresql':
+        return _postgres_search(tasks, terms)
+    return _fallback_search(tasks, terms)
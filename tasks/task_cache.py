@@ -0,0 +1,104 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import Task
+
+# Read-through cache of active Task rows keyed by id. The backing cache is the
+# TASK_CACHE_ALIAS entry in CACHES: the local-memory default is a per-process
+# LRU bounded by MAX_ENTRIES, while a shared backend keeps every worker's view
+# consistent after invalidation.
+CACHE_KEY = 'task:{task_id}'
+
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+_stats_lock = threading.Lock()
+
+
+def _get_cache():
+    return caches[getattr(settings, 'TASK_CACHE_ALIAS', 'default')]
+
+
+def _record(**counts):
+    with _stats_lock:
+        for name, count in counts.items():
+            _stats[name] += count
+
+
+def get_task_cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def get_active_tasks(task_ids):
+    """
+    Returns ``{id: Task}`` for the active tasks among ``task_ids``; inactive
+    and unknown ids are left out.
+    """
+    cache = _get_cache()
+    task_ids = set(task_ids)
+    cached = cache.get_many([CACHE_KEY.format(task_id=task_id) for task_id in task_ids])
+    tasks = {task.id: task for task in cached.values()}
+    missing = task_ids - tasks.keys()
+    _record(hits=len(tasks), misses=len(missing))
+
+    if missing:
+        # Filled from the primary: a lagging replica could re-cache a row
+        # that was just invalidated.
+        loaded = {task.id: task for task in Task.objects.using(DEFAULT_DB_ALIAS).filter(id__in=missing, is_active=True)}
+        cache.set_many({CACHE_KEY.format(task_id=task_id): task for task_id, task in loaded.items()})
+        tasks.update(loaded)
+    return tasks
+
+
+async def aget_active_tasks(task_ids):
+    cache = _get_cache()
+    task_ids = set(task_ids)
+    cached = await cache.aget_many([CACHE_KEY.format(task_id=task_id) for task_id in task_ids])
+    tasks = {task.id: task for task in cached.values()}
+    missing = task_ids - tasks.keys()
+    _record(hits=len(tasks), misses=len(missing))
+
+    if missing:
+        loaded = {task.id: task async for task in Task.objects.using(DEFAULT_DB_ALIAS).filter(id__in=missing, is_active=True)}
+        await cache.aset_many({CACHE_KEY.format(task_id=task_id): task for task_id, task in loaded.items()})
+        tasks.update(loaded)
+    return tasks
+
+
+def _task_id(task_id):
+    try:
+        return int(task_id)
+    except (TypeError, ValueError):
+        raise Task.DoesNotExist
+
+
+def get_active_task(task_id):
+    task_id = _task_id(task_id)
+    task = get_active_tasks([task_id]).get(task_id)
+    if task is None:
+        raise Task.DoesNotExist
+    return task
+
+
+async def aget_active_task(task_id):
+    task_id = _task_id(task_id)
+    task = (await aget_active_tasks([task_id])).get(task_id)
+    if task is None:
+        raise Task.DoesNotExist
+    return task
+
+
+def invalidate_tasks(*task_ids):
+    if not task_ids:
+        return
+    keys = [CACHE_KEY.format(task_id=task_id) for task_id in task_ids]
+    _get_cache().delete_many(keys)
+    # Drop it again once committed, in case a concurrent reader re-cached the
+    # old row before this transaction became visible.
+    transaction.on_commit(lambda: _get_cache().delete_many(keys))
+    _record(invalidations=len(keys))
@@ -1,12 +1,22 @@
 from django.urls import path
-from .views import CreateTask, AssignTask, UpdateUserTaskStatus, UserTasks, DeleteTask, UpdateTask, FetchAllTasks
+from .async_views import AsyncFetchAllTasks, AsyncUserTasks
+from .views import CreateTask, CreateTasksBatch, AssignTask, UpdateUserTaskStatus, BulkUpdateUserTaskStatus, UserTasks, DeleteTask, UpdateTask, FetchAllTasks, SearchTasks, CreateExport, ExportStatus, DownloadExport, ImportTasks
 
 urlpatterns = [
     path('create/', CreateTask.as_view(), name='task-create'),
+    path('create/batch/', CreateTasksBatch.as_view(), name='task-create-batch'),
+    path('import/', ImportTasks.as_view(), name='task-import'),
     path('assign/', AssignTask.as_view(), name='task-assign'),
     path('user-tasks/', UserTasks.as_view(), name='user-tasks'),
     path('delete/', DeleteTask.as_view(), name='task-delete'),
     path('update/', UpdateTask.as_view(), name='task-update'),
     path('fetch/', FetchAllTasks.as_view(), name='task-fetch'),
+    path('search/', SearchTasks.as_view(), name='task-search'),
     path('update-my-task-status/', UpdateUserTaskStatus.as_view(), name='update-user-task-status-by-id'),
+    path('async/fetch/', AsyncFetchAllTasks.as_view(), name='task-fetch-async'),
+    path('async/user-tasks/', AsyncUserTasks.as_view(), name='user-tasks-async'),
+    path('update-my-task-status/bulk/', BulkUpdateUserTaskStatus.as_view(), name='bulk-update-user-task-status'),
+    path('exports/', CreateExport.as_view(), name='export-create'),
+    path('exports/status/', ExportStatus.as_view(), name='export-status'),
+    path('exports/download/', DownloadExport.as_view(), name='export-download'),
 ] 
\ No newline at end of file
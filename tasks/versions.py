@@ -0,0 +1,82 @@
+import hashlib
+import uuid
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .filters import get_user_id_param
+from .models import ChangeVersion
+
+TASKS_SCOPE = 'tasks'
+TASK_COUNTS_SCOPE = 'task_counts'
+
+
+def user_tasks_scope(user_id):
+    return f'user_tasks:{user_id}'
+
+
+def bump_versions(*scopes):
+    # Applied after commit so concurrent writers never queue on the hot "tasks"
+    # row, and readers never see a new version before the data it stands for.
+    def bump():
+        ChangeVersion.objects.bulk_create(
+            [ChangeVersion(scope=scope, version=uuid.uuid4()) for scope in sorted(set(scopes))],
+            update_conflicts=True, unique_fields=['scope'], update_fields=['version', 'changed_at'],
+        )
+    if scopes:
+        transaction.on_commit(bump)
+
+
+def _etag_for(request, scopes, versions):
+    key = '|'.join([*(f'{scope}={versions.get(scope, "")}' for scope in scopes), request.get_full_path()])
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def get_etag(request, *scopes):
+    """
+    ETag for a listing built from ``scopes``: it changes whenever one of them
+    is bumped, and differs between URLs so that each page and filter
+    combination validates separately.
+    """
+    versions = dict(ChangeVersion.objects.filter(scope__in=scopes).values_list('scope', 'version'))
+    return _etag_for(request, scopes, versions)
+
+
+async def aget_etag(request, *scopes):
+    versions = {
+        scope: version async for scope, version in ChangeVersion.objects.filter(scope__in=scopes).values_list('scope', 'version')
+    }
+    return _etag_for(request, scopes, versions)
+
+
+def _tasks_scopes():
+    # The task list embeds assignment counts, which change on every assignment.
+    return TASKS_SCOPE, TASK_COUNTS_SCOPE
+
+
+def _user_tasks_scopes(request):
+    # Inbox rows embed task fields, so task edits invalidate them too. None
+    # for an invalid user_id: no ETag, and the view answers 400.
+    try:
+        user_id = get_user_id_param(request.GET, request.user.id)
+    except ValidationError:
+        return None
+    return TASKS_SCOPE, user_tasks_scope(user_id)
+
+
+def tasks_etag(request, *args, **kwargs):
+    return get_etag(request, *_tasks_scopes())
+
+
+def user_tasks_etag(request, *args, **kwargs):
+    scopes = _user_tasks_scopes(request)
+    return scopes and get_etag(request, *scopes)
+
+
+async def atasks_etag(request):
+    return await aget_etag(request, *_tasks_scopes())
+
+
+async def auser_tasks_etag(request):
+    scopes = _user_tasks_scopes(request)
+    return scopes and await aget_etag(request, *scopes)
@@ -1,20 +1,85 @@
+import codecs
+import csv
+
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, BasePermission
 from django.shortcuts import get_object_or_404
+from django.http import FileResponse
+from django.urls import reverse
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.db import transaction
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Case, When
 from rest_framework.exceptions import ValidationError
 
-from .models import Task, UserTask
+from task_manager_josh.db_router import ReplicaReadsMixin
+from task_manager_josh.pagination import get_page_size, paginate_keyset, pagination_requested
+from task_manager_josh.streaming import stream_envelope, streaming_requested
+from users.permission_cache import user_has_custom_permission
+from .filters import filter_user_tasks, get_user_id_param, get_user_task_ordering
+from .counters import STATUSES, adjust_assignment_counts, get_assignment_counts, record_transitions
+from .exports import create_export, export_filename, export_path
+from .imports import TaskImporter, import_format, parse_rows
+from .models import Export, Task, UserTask
+from .search import SEARCH_ORDERING, search_tasks
+from .task_cache import get_active_task, invalidate_tasks
+from .versions import TASK_COUNTS_SCOPE, TASKS_SCOPE, bump_versions, tasks_etag, user_tasks_etag, user_tasks_scope
 from .serializers import TaskSerializer, UserTaskSerializer
 
+TASK_LIST_ORDERING = ('created_at', 'id')
+
+def task_data(task):
+    return {
+        "id": task.id,
+        "name": task.name,
+        "description": task.description,
+        "created_at": task.created_at,
+        "task_type": task.task_type,
+        "is_active": task.is_active
+    }
+
+def task_list_data(task):
+    counts = getattr(task, 'assignment_counts', None)
+    return {
+        **task_data(task),
+        "assignments": counts.as_dict() if counts else dict.fromkeys(STATUSES, 0)
+    }
+
+def export_data(export):
+    return {
+        "id": export.id,
+        "kind": export.kind,
+        "format": export.format,
+        "filters": export.filters,
+        "status": export.status,
+        "rows": export.rows,
+        "size": export.size,
+        "error": export.error,
+        "created_at": export.created_at,
+        "started_at": export.started_at,
+        "finished_at": export.finished_at,
+        "download_url": f"{reverse('export-download')}?id={export.id}" if export.status == 'completed' else None
+    }
+
+def user_task_data(user_task):
+    return {
+        **task_data(user_task.task),
+        # UserTask specific fields
+        "status": user_task.status,
+        "assigned_at": user_task.assigned_at,
+        "completed_at": user_task.completed_at
+    }
+
 class HasCustomPermission(BasePermission):
     def has_permission(self, request, view):
         permission_codename = view.permission_codename
-        return request.user.custom_permissions.filter(codename=permission_codename).exists()
+        return user_has_custom_permission(request.user, permission_codename)
 
 class CreateTask(APIView):
     permission_classes = [IsAuthenticated, HasCustomPermission]
@@ -24,6 +89,7 @@ class CreateTask(APIView):
         serializer = TaskSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
+            bump_versions(TASKS_SCOPE)
             return Response({
                 "success": True,
                 "status": 201,
@@ -38,15 +104,129 @@ class CreateTask(APIView):
                 "data": serializer.errors
             }, status=status.HTTP_400_BAD_REQUEST)
 
+class CreateTasksBatch(APIView):
+    permission_classes = [IsAuthenticated, HasCustomPermission]
+    permission_codename = 'create_task'
+    @transaction.atomic
+    def post(self, request):
+        tasks = request.data.get('tasks')
+        # all-or-nothing by default; "partial" creates every valid item
+        mode = request.data.get('mode', 'atomic')
+
+        if not isinstance(tasks, list) or not tasks:
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": "A non-empty list of tasks is required"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if mode not in ('atomic', 'partial'):
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": "Mode must be one of: atomic, partial"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(tasks) > settings.TASK_BATCH_MAX_SIZE:
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": f"At most {settings.TASK_BATCH_MAX_SIZE} tasks can be created per request"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Validated item by item rather than with many=True: a failing list
+        # serializer discards the validated data that partial mode still needs.
+        results, valid = [], []
+        for index, item in enumerate(tasks):
+            child = TaskSerializer(data=item)
+            if child.is_valid():
+                results.append({"index": index, "success": True, "errors": None})
+                valid.append((results[-1], child.validated_data))
+            else:
+                results.append({"index": index, "success": False, "errors": child.errors})
+        failed = len(results) - len(valid)
+
+        if failed and mode == 'atomic':
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": "Something went wrong",
+                "data": results
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        created = Task.objects.bulk_create(
+            [Task(**data) for _, data in valid], batch_size=settings.TASK_BATCH_CHUNK_SIZE
+        )
+        for (result, _), task in zip(valid, created):
+            result["data"] = TaskSerializer(task).data
+        bump_versions(TASKS_SCOPE)
+
+        return Response({
+            "success": not failed,
+            "status": 201 if not failed else 207,
+            "message": "Tasks created successfully" if not failed else f"{len(created)} tasks created, {failed} failed",
+            "data": results
+        }, status=status.HTTP_201_CREATED if not failed else status.HTTP_207_MULTI_STATUS)
+
+class ImportTasks(APIView):
+    permission_classes = [IsAuthenticated, HasCustomPermission]
+    permission_codename = 'create_task'
+    def post(self, request):
+        # A multipart "file" field, or the file itself as the request body.
+        if request.content_type.startswith('multipart/form-data'):
+            upload = request.FILES.get('file')
+            source = upload
+            file_format = upload and (import_format(upload.name) or import_format(upload.content_type))
+        else:
+            source = request.stream
+            file_format = import_format(request.content_type)
+
+        if source is None or file_format is None:
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": "A CSV (text/csv) or NDJSON (application/x-ndjson) file is required"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Assigning while importing needs the same permission as AssignTask.
+        importer = TaskImporter(allow_assignments=user_has_custom_permission(request.user, 'assign_task'))
+        try:
+            report = importer.run(parse_rows(codecs.iterdecode(source, 'utf-8-sig'), file_format))
+        except (UnicodeDecodeError, csv.Error) as e:
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": f"Could not read the file: {e}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not report['tasks']:
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": "No tasks were imported",
+                "data": report
+            }, status=status.HTTP_400_BAD_REQUEST)
+        failed = report['rejected']
+        return Response({
+            "success": not failed,
+            "status": 201 if not failed else 207,
+            "message": "Tasks imported successfully" if not failed else f"{report['tasks']} tasks imported, {failed} rows rejected",
+            "data": report
+        }, status=status.HTTP_201_CREATED if not failed else status.HTTP_207_MULTI_STATUS)
+
+def is_int_list(values):
+    return isinstance(values, list) and all(isinstance(value, int) and not isinstance(value, bool) for value in values)
+
 class AssignTask(APIView):
     permission_classes = [IsAuthenticated, HasCustomPermission]
     permission_codename = 'assign_task'
     @transaction.atomic
     def post(self, request):
         task_id = request.query_params.get('task_id')
+        task_ids = [task_id] if task_id else request.data.get('task_ids')
         user_ids = request.data.get('user_ids')
 
-        if not task_id:
+        if not task_ids:
             return Response({
                 "success": False,
                 "status": 400,
@@ -60,16 +240,31 @@ class AssignTask(APIView):
                 "message": "User IDs are required"
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            task = Task.objects.get(id=task_id, is_active=True)
-        except Task.DoesNotExist:
+        # A string would otherwise be iterated character by character.
+        if task_id:
+            try:
+                task_ids = [int(task_id)]
+            except ValueError:
+                task_ids = None
+        if not is_int_list(task_ids) or not is_int_list(user_ids):
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": "Task and user IDs must be lists of integers"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        task_ids, user_ids = set(task_ids), set(user_ids)
+
+        # Locked rows rather than the task cache, which may not have seen another
+        # worker's soft delete yet; id order keeps concurrent assigns from deadlocking.
+        tasks = list(Task.objects.select_for_update().filter(id__in=task_ids, is_active=True).order_by('id'))
+        if len(tasks) != len(task_ids):
             return Response({
                 "success": False,
                 "status": 404,
                 "message": "Task not found or is inactive"
             }, status=status.HTTP_404_NOT_FOUND)
 
-        users = get_user_model().objects.filter(id__in=user_ids)
+        users = list(get_user_model().objects.filter(id__in=user_ids).only('id', 'email').order_by('id'))
         if len(users) != len(user_ids):
             return Response({
                 "success": False,
@@ -77,84 +272,119 @@ class AssignTask(APIView):
                 "message": "One or more users not found"
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        assigned_users = []
-        for user in users:
-            # Check if user already has an active assignment for this task
-            user_task = UserTask.objects.filter(user=user, task=task).exclude(status='completed').first()
-            
-            if user_task:
-                return Response({
-                    "success": False,
-                    "status": 400,
-                    "message": f"User {user.email} is already assigned to this task and hasn't completed it yet."
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Create new UserTask entry
-            UserTask.objects.create(
-                user=user,
-                task=task,
-                status='open'
-            )
-            assigned_users.append(user.email)
+        # Single conflict check for every (user, task) pair
+        conflict = UserTask.objects.filter(
+            user_id__in=user_ids, task_id__in=task_ids
+        ).exclude(status='completed').values_list('user__email', flat=True).first()
+        if conflict:
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": f"User {conflict} is already assigned to this task and hasn't completed it yet."
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        # You'll need to update the TaskSerializer to work with the new model structure
-        # For now, returning basic task info and assigned users
+        # The usertask_one_active_assignment constraint rejects duplicates
+        # created by concurrent requests after the check above.
+        try:
+            with transaction.atomic():
+                UserTask.objects.bulk_create([
+                    UserTask(user_id=user.id, task_id=task.id, status='open')
+                    for task in tasks for user in users
+                ])
+        except IntegrityError:
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": "One or more users are already assigned to this task and haven't completed it yet."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        adjust_assignment_counts({task.id: {'open': len(users)} for task in tasks})
+        bump_versions(TASK_COUNTS_SCOPE, *(user_tasks_scope(user.id) for user in users))
+        assigned_users = [user.email for user in users]
+        assignments = [{
+            "task_id": task.id,
+            "task_name": task.name,
+            "assigned_users": assigned_users
+        } for task in tasks]
         return Response({
             "success": True,
             "status": 200,
             "message": "Task assigned successfully",
-            "data": {
-                "task_id": task.id,
-                "task_name": task.name,
-                "assigned_users": assigned_users
-            }
+            "data": assignments[0] if task_id else assignments
         }, status=status.HTTP_200_OK)
 
-class UserTasks(APIView):
+class UserTasks(ReplicaReadsMixin, APIView):
     permission_classes = [IsAuthenticated, HasCustomPermission]
     permission_codename = 'fetch_task'
+    @method_decorator(condition(etag_func=user_tasks_etag))
     def get(self, request):
-        user_id = request.query_params.get('user_id')
+        try:
+            user_id = get_user_id_param(request.query_params, None)
+        except ValidationError as e:
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": e.detail[0]
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        if not user_id:
+        if user_id is None:
             user_id = request.user.id
-
-        try:
-            user = get_user_model().objects.get(id=user_id)
-        except get_user_model().DoesNotExist:
+        elif not get_user_model().objects.filter(id=user_id).exists():
             return Response({
                 "success": False,
                 "status": 404,
                 "message": "User not found"
             }, status=status.HTTP_404_NOT_FOUND)
 
-        # Get all UserTask entries for this user
-        user_tasks = UserTask.objects.filter(user=user).select_related('task')
-        
+        # Filters, ordering and the page window are all applied in one query
+        user_tasks = UserTask.objects.filter(user_id=user_id).select_related('task').only(
+            'id', 'status', 'assigned_at', 'completed_at',
+            'task__id', 'task__name', 'task__description', 'task__created_at', 'task__task_type', 'task__is_active',
+        )
+        next_cursor = None
+        try:
+            user_tasks = filter_user_tasks(user_tasks, request.query_params)
+            ordering = get_user_task_ordering(request.query_params)
+            if streaming_requested(request):
+                return stream_envelope({
+                    "success": True,
+                    "status": 200,
+                    "message": "Tasks fetched successfully"
+                }, map(user_task_data, user_tasks.order_by(*ordering).iterator(chunk_size=settings.STREAMING_CHUNK_SIZE)))
+            if pagination_requested(request):
+                user_tasks, next_cursor = paginate_keyset(
+                    user_tasks, ordering,
+                    cursor=request.query_params.get('cursor'),
+                    page_size=get_page_size(request),
+                )
+            else:
+                user_tasks = user_tasks.order_by(*ordering)
+        except ValidationError as e:
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": e.detail[0]
+            }, status=status.HTTP_400_BAD_REQUEST)
+
         # Format the response data
-        tasks_data = []
-        for user_task in user_tasks:
-            task_data = {
-                "id": user_task.task.id,
-                "name": user_task.task.name,
-                "description": user_task.task.description,
-                "created_at": user_task.task.created_at,
-                "task_type": user_task.task.task_type,
-                "is_active": user_task.task.is_active,
-                # UserTask specific fields
-                "status": user_task.status,
-                "assigned_at": user_task.assigned_at,
-                "completed_at": user_task.completed_at
-            }
-            tasks_data.append(task_data)
+        tasks_data = [user_task_data(user_task) for user_task in user_tasks]
             
         return Response({
             "success": True,
             "status": 200,
             "message": "Tasks fetched successfully",
-            "data": tasks_data
+            "data": tasks_data,
+            "next": next_cursor
         }, status=status.HTTP_200_OK)
         
+def lock_active_task(task_id):
+    # Writes start from the locked row, never from the task cache, whose copy
+    # may predate another worker's edit or soft delete.
+    try:
+        return Task.objects.select_for_update().get(id=int(task_id), is_active=True)
+    except (TypeError, ValueError):
+        raise Task.DoesNotExist
+
 class DeleteTask(APIView):
     permission_classes = [IsAuthenticated, HasCustomPermission]
     permission_codename = 'delete_task'
@@ -169,7 +399,7 @@ class DeleteTask(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            task = Task.objects.get(id=id, is_active=True)
+            task = lock_active_task(id)
         except Task.DoesNotExist:
             return Response({
                 "success": False,
@@ -178,9 +408,11 @@ class DeleteTask(APIView):
             }, status=status.HTTP_404_NOT_FOUND)
 
         # Check for users with open or in_progress tasks
-        user_tasks = UserTask.objects.filter(task=task, status__in=['open', 'in_progress'])
-        if user_tasks.exists():
-            users_with_pending_tasks = [ut.user.email for ut in user_tasks]
+        counts = get_assignment_counts(task.id)
+        if counts['open'] or counts['in_progress']:
+            users_with_pending_tasks = list(UserTask.objects.filter(
+                task=task, status__in=['open', 'in_progress']
+            ).values_list('user__email', flat=True))
             return Response({
                 "success": False,
                 "status": 400,
@@ -190,6 +422,8 @@ class DeleteTask(APIView):
 
         task.is_active = False
         task.save()
+        invalidate_tasks(task.id)
+        bump_versions(TASKS_SCOPE)
         return Response({
             "success": True,
             "status": 200,
@@ -209,7 +443,7 @@ class UpdateTask(APIView):
                 "message":"id not provided"
             },status=status.HTTP_404_NOT_FOUND)
         try:
-            task = Task.objects.get(id=id, is_active=True)
+            task = lock_active_task(id)
         except Task.DoesNotExist:
             return Response({
                 "success":False,
@@ -222,6 +456,7 @@ class UpdateTask(APIView):
 
         if serializer.is_valid():
             serializer.save()
+            bump_versions(TASKS_SCOPE)
             return Response({
                 "success":True,
                 "status":200,
@@ -236,44 +471,52 @@ class UpdateTask(APIView):
                 "data": serializer.errors
             },status=status.HTTP_400_BAD_REQUEST)
 
-class FetchAllTasks(APIView):
+class FetchAllTasks(ReplicaReadsMixin, APIView):
     permission_classes = [IsAuthenticated, HasCustomPermission]
     permission_codename = 'fetch_task'
 
+    @method_decorator(condition(etag_func=tasks_etag))
     def get(self, request):
         id = request.query_params.get('id')
         if id is None:
-            tasks = Task.objects.filter(is_active=True)
-            tasks_data = [{
-                "id": task.id,
-                "name": task.name,
-                "description": task.description,
-                "created_at": task.created_at,
-                "task_type": task.task_type,
-                "is_active": task.is_active
-            } for task in tasks]
+            tasks = Task.objects.filter(is_active=True).select_related('assignment_counts')
+            if streaming_requested(request):
+                return stream_envelope({
+                    "success": True,
+                    "status": 200,
+                    "message": "Tasks fetched successfully"
+                }, map(task_list_data, tasks.order_by(*TASK_LIST_ORDERING).iterator(chunk_size=settings.STREAMING_CHUNK_SIZE)))
+
+            next_cursor = None
+            if pagination_requested(request):
+                try:
+                    tasks, next_cursor = paginate_keyset(
+                        tasks, TASK_LIST_ORDERING,
+                        cursor=request.query_params.get('cursor'),
+                        page_size=get_page_size(request),
+                    )
+                except ValidationError as e:
+                    return Response({
+                        "success": False,
+                        "status": 400,
+                        "message": e.detail[0]
+                    }, status=status.HTTP_400_BAD_REQUEST)
+            tasks_data = [task_list_data(task) for task in tasks]
             return Response({
                 "success": True,
                 "status": 200,
                 "message": "Tasks fetched successfully",
-                "data": tasks_data
+                "data": tasks_data,
+                "next": next_cursor
             }, status=status.HTTP_200_OK)
         else:
             try:
-                task = Task.objects.get(id=id, is_active=True)
-                task_data = {
-                    "id": task.id,
-                    "name": task.name,
-                    "description": task.description,
-                    "created_at": task.created_at,
-                    "task_type": task.task_type,
-                    "is_active": task.is_active
-                }
+                task = get_active_task(id)
                 return Response({
                     "success": True,
                     "status": 200,
                     "message": "Task fetched successfully",
-                    "data": task_data
+                    "data": {**task_data(task), "assignments": get_assignment_counts(task.id)}
                 }, status=status.HTTP_200_OK)
             except Task.DoesNotExist:
                 return Response({
@@ -282,6 +525,37 @@ class FetchAllTasks(APIView):
                     "message": "Task not found"
                 }, status=status.HTTP_404_NOT_FOUND)
 
+class SearchTasks(ReplicaReadsMixin, APIView):
+    permission_classes = [IsAuthenticated, HasCustomPermission]
+    permission_codename = 'fetch_task'
+
+    def get(self, request):
+        assigned = request.query_params.get('assigned', 'false').lower() in ('true', '1', 'yes')
+        try:
+            tasks = search_tasks(
+                request.query_params.get('q'),
+                user_id=request.user.id if assigned else None,
+            ).select_related('assignment_counts')
+            tasks, next_cursor = paginate_keyset(
+                tasks, SEARCH_ORDERING,
+                cursor=request.query_params.get('cursor'),
+                page_size=get_page_size(request),
+            )
+        except ValidationError as e:
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": e.detail[0]
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "success": True,
+            "status": 200,
+            "message": "Tasks fetched successfully",
+            "data": [{**task_list_data(task), "rank": task.rank} for task in tasks],
+            "next": next_cursor
+        }, status=status.HTTP_200_OK)
+
 class UpdateUserTaskStatus(APIView):
     permission_classes = [IsAuthenticated]
     permission_codename = 'update_user_task_status'
@@ -314,70 +588,243 @@ class UpdateUserTaskStatus(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
             
         try:
-            # Get the user task assignment - specifically for the current user
-            user_task = UserTask.objects.get(
-                user=request.user,  # Ensures the task is assigned to the current user
+            task_id = int(task_id)
+        except ValueError:
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": "Task ID must be an integer"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Compare-and-swap: the UPDATE only matches when the current status
+        # allows the transition, so concurrent updates cannot both succeed.
+        user_task = UserTask.transition(request.user.id, task_id, new_status)
+
+        if user_task is None:
+            # Nothing changed; look up the assignment to explain why
+            current_status = UserTask.objects.filter(
+                user_id=request.user.id,  # Ensures the task is assigned to the current user
                 task_id=task_id
-            )
-        except UserTask.DoesNotExist:
+            ).order_by(Case(When(status='completed', then=1), default=0)).values_list('status', flat=True).first()
+            if current_status is None:
+                return Response({
+                    "success": False,
+                    "status": 404,
+                    "message": "Task not assigned to you or not found"
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            message = UserTask.transition_error(current_status, new_status)
+            if message is None:
+                return Response({
+                    "success": False,
+                    "status": 409,
+                    "message": "Task status was changed by another request, please retry"
+                }, status=status.HTTP_409_CONFLICT)
             return Response({
                 "success": False,
-                "status": 404,
-                "message": "Task not assigned to you or not found"
-            }, status=status.HTTP_404_NOT_FOUND)
+                "status": 400,
+                "message": message
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        record_transitions([(user_task.task_id, user_task.previous_status, user_task.status)])
+        bump_versions(TASK_COUNTS_SCOPE, user_tasks_scope(request.user.id))
+
+        # Prepare response data
+        response_data = {
+            "task_id": user_task.task_id,
+            "task_name": user_task.task_name,
+            "status": user_task.status,
+            "assigned_at": user_task.assigned_at,
+            "completed_at": user_task.completed_at
+        }
         
-        # Check if task is already completed
-        if user_task.status == 'completed':
+        return Response({
+            "success": True,
+            "status": 200,
+            "message": "Task status updated successfully",
+            "data": response_data
+        }, status=status.HTTP_200_OK)
+
+class BulkUpdateUserTaskStatus(APIView):
+    permission_classes = [IsAuthenticated]
+    permission_codename = 'update_user_task_status'
+    @transaction.atomic
+    def put(self, request):
+        updates = request.data.get('updates')
+
+        if not isinstance(updates, list) or not updates:
             return Response({
                 "success": False,
                 "status": 400,
-                "message": "Cannot change status of a completed task"
+                "message": "A non-empty list of updates is required"
             }, status=status.HTTP_400_BAD_REQUEST)
-            
-        # Validate logical status transitions
-        if user_task.status == 'open' and new_status not in ['in_progress', 'blocked']:
+
+        if len(updates) > settings.TASK_BATCH_MAX_SIZE:
             return Response({
                 "success": False,
                 "status": 400,
-                "message": "Open tasks can only be moved to 'in_progress' or 'blocked'"
+                "message": f"At most {settings.TASK_BATCH_MAX_SIZE} updates can be applied per request"
             }, status=status.HTTP_400_BAD_REQUEST)
-            
-        if user_task.status == 'blocked' and new_status not in ['in_progress', 'open']:
+
+        valid_statuses = [status_choice[0] for status_choice in UserTask.STATUS_CHOICES]
+        results = []
+        for update in updates:
+            task_id = update.get('task_id') if isinstance(update, dict) else None
+            new_status = update.get('status') if isinstance(update, dict) else None
+            result = {"task_id": task_id, "status": new_status, "success": False, "message": None}
+            results.append(result)
+            try:
+                result["task_id"] = int(task_id)
+            except (TypeError, ValueError):
+                result["message"] = "Task ID is required"
+                continue
+            if new_status not in valid_statuses:
+                result["message"] = f"Invalid status. Must be one of: {', '.join(valid_statuses)}"
+
+        requested = [r for r in results if r["message"] is None]
+        task_ids = [r["task_id"] for r in requested]
+        if len(set(task_ids)) != len(task_ids):
             return Response({
                 "success": False,
                 "status": 400,
-                "message": "Blocked tasks can only be moved to 'in_progress' or 'open'"
+                "message": "Each task can only appear once per request"
             }, status=status.HTTP_400_BAD_REQUEST)
-            
-        if user_task.status == 'in_progress' and new_status not in ['completed', 'blocked']:
+
+        # Lock the caller's assignments once; the active row wins over completed ones.
+        current = {}
+        for task_id, current_status in UserTask.objects.select_for_update().filter(
+            user_id=request.user.id, task_id__in=task_ids
+        ).values_list('task_id', 'status'):
+            if current.get(task_id) in (None, 'completed'):
+                current[task_id] = current_status
+
+        by_status = {}
+        for result in requested:
+            if result["task_id"] not in current:
+                result["message"] = "Task not assigned to you or not found"
+                continue
+            result["message"] = UserTask.transition_error(current[result["task_id"]], result["status"])
+            if result["message"] is None:
+                by_status.setdefault(result["status"], []).append(result["task_id"])
+
+        # One UPDATE per target status, guarded by the statuses allowed to move there
+        now = timezone.now()
+        for new_status, ids in by_status.items():
+            changes = {"status": new_status}
+            if new_status == 'completed':
+                changes["completed_at"] = now
+            UserTask.objects.filter(
+                user_id=request.user.id, task_id__in=ids, status__in=UserTask.statuses_moving_to(new_status)
+            ).update(**changes)
+
+        if by_status:
+            record_transitions(
+                (task_id, current[task_id], new_status) for new_status, ids in by_status.items() for task_id in ids
+            )
+            bump_versions(TASK_COUNTS_SCOPE, user_tasks_scope(request.user.id))
+
+        failed = 0
+        for result in results:
+            result["success"] = result["message"] is None
+            failed += not result["success"]
+
+        return Response({
+            "success": not failed,
+            "status": 200 if not failed else 207,
+            "message": "Task statuses updated successfully" if not failed else f"{len(results) - failed} tasks updated, {failed} failed",
+            "data": results
+        }, status=status.HTTP_200_OK if not failed else status.HTTP_207_MULTI_STATUS)
+
+
+def get_own_export(request):
+    export_id = request.query_params.get('id')
+    if export_id is None:
+        raise ValidationError("Export ID is required")
+    try:
+        export = Export.objects.get(id=export_id)
+    except (Export.DoesNotExist, DjangoValidationError):
+        return None
+    if export.requested_by_id == request.user.id:
+        return export
+    # Staff may read any export. A stateless token user carries no is_staff
+    # claim, so the flag is read from the User row, and only for exports
+    # requested by someone else.
+    if get_user_model().objects.filter(id=request.user.id, is_staff=True).exists():
+        return export
+    return None
+
+class CreateExport(APIView):
+    permission_classes = [IsAuthenticated]
+    def post(self, request):
+        kind = request.data.get('kind')
+        # Task and assignment exports need the same permission as the listings they replace.
+        if kind in ('tasks', 'user_tasks') and not user_has_custom_permission(request.user, 'fetch_task'):
+            self.permission_denied(request)
+        try:
+            export = create_export(request.user, kind, request.data.get('format', 'csv'), request.data.get('filters', {}))
+        except ValidationError as e:
             return Response({
                 "success": False,
                 "status": 400,
-                "message": "In-progress tasks can only be moved to 'completed' or 'blocked'"
+                "message": e.detail[0]
             }, status=status.HTTP_400_BAD_REQUEST)
-            
-        # Update the status
-        user_task.status = new_status
-        
-        # If status is changed to completed, update completed_at timestamp
-        if new_status == 'completed':
-            from django.utils import timezone
-            user_task.completed_at = timezone.now()
-            
-        user_task.save()
-        
-        # Prepare response data
-        response_data = {
-            "task_id": user_task.task.id,
-            "task_name": user_task.task.name,
-            "status": user_task.status,
-            "assigned_at": user_task.assigned_at,
-            "completed_at": user_task.completed_at
-        }
-        
+        return Response({
+            "success": True,
+            "status": 202,
+            "message": "Export requested successfully",
+            "data": export_data(export)
+        }, status=status.HTTP_202_ACCEPTED)
+
+class ExportStatus(APIView):
+    permission_classes = [IsAuthenticated]
+    def get(self, request):
+        try:
+            export = get_own_export(request)
+        except ValidationError as e:
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": e.detail[0]
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if export is None:
+            return Response({
+                "success": False,
+                "status": 404,
+                "message": "Export not found"
+            }, status=status.HTTP_404_NOT_FOUND)
         return Response({
             "success": True,
             "status": 200,
-            "message": "Task status updated successfully",
-            "data": response_data
+            "message": "Export fetched successfully",
+            "data": export_data(export)
         }, status=status.HTTP_200_OK)
+
+class DownloadExport(APIView):
+    permission_classes = [IsAuthenticated]
+    def get(self, request):
+        try:
+            export = get_own_export(request)
+        except ValidationError as e:
+            return Response({
+                "success": False,
+                "status": 400,
+                "message": e.detail[0]
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if export is None:
+            return Response({
+                "success": False,
+                "status": 404,
+                "message": "Export not found"
+            }, status=status.HTTP_404_NOT_FOUND)
+        if export.status != 'completed':
+            return Response({
+                "success": False,
+                "status": 409,
+                "message": f"Export is {export.status}",
+                "data": export_data(export)
+            }, status=status.HTTP_409_CONFLICT)
+        # Streamed from disk in blocks, so large files do not load into memory.
+        return FileResponse(
+            open(export_path(export), 'rb'), as_attachment=True, filename=export_filename(export),
+            content_type='application/gzip'
+        )
@@ -0,0 +1,50 @@
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+from task_manager_josh.async_api import AsyncAPIView
+from task_manager_josh.pagination import apaginate_keyset, get_page_size, pagination_requested
+from task_manager_josh.streaming import amap, astream_envelope, streaming_requested
+
+from .views import user_list
+
+
+class AsyncFetchUsers(AsyncAPIView):
+    replica_reads = True
+
+    async def get(self, request):
+        try:
+            users, user_data_for = user_list(request)
+            if streaming_requested(request):
+                return astream_envelope({
+                    "success": True,
+                    "message": "Users Fetched SuccessFully"
+                }, amap(user_data_for, users.order_by('id').aiterator(chunk_size=settings.STREAMING_CHUNK_SIZE)))
+
+            next_cursor = None
+            if pagination_requested(request):
+                users, next_cursor = await apaginate_keyset(
+                    users, ('id',),
+                    cursor=request.query_params.get('cursor'),
+                    page_size=get_page_size(request),
+                )
+            else:
+                users = [user async for user in users.order_by('id')]
+        except ValidationError as e:
+            return {
+                "success": False,
+                "message": e.detail[0],
+                "data": None
+            }, 400
+
+        if users:
+            return {
+                "success": True,
+                "message": "Users Fetched SuccessFully",
+                "data": [user_data_for(user) for user in users],
+                "next": next_cursor
+            }, 200
+        return {
+            "success": False,
+            "message": "No Users Found",
+            "data": None
+        }, 404
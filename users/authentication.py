@@ -0,0 +1,24 @@
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.models import TokenUser
+
+from .tokens import EMAIL_CLAIM, PERMISSIONS_CLAIM, PERMISSIONS_VERSION_CLAIM
+
+
+class ClaimsTokenUser(TokenUser):
+    """
+    Stateless user built from access token claims, used together with
+    JWTStatelessUserAuthentication so that authenticated requests never load
+    the User row.
+    """
+
+    @cached_property
+    def email(self):
+        return self.token.get(EMAIL_CLAIM, '')
+
+    @cached_property
+    def custom_permission_codenames(self):
+        return frozenset(self.token.get(PERMISSIONS_CLAIM, ()))
+
+    @cached_property
+    def permissions_version(self):
+        return self.token.get(PERMISSIONS_VERSION_CLAIM)
@@ -37,6 +37,7 @@ class User(AbstractUser):
     custom_permissions = models.ManyToManyField(
         CustomPermission, related_name='users', blank=True
     )
+    permissions_version = models.PositiveIntegerField(default=0)
 
     objects = CustomUserManager()
 
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.cache import caches
+
+# Per-user sets of CustomPermission codenames. The backing cache is configured
+# through the PERMISSION_CACHE_ALIAS entry in CACHES, which bounds its size
+# (MAX_ENTRIES) and evicts entries after TIMEOUT seconds.
+CACHE_KEY = 'user_permissions:{user_id}'
+
+
+def _get_cache():
+    return caches[getattr(settings, 'PERMISSION_CACHE_ALIAS', 'default')]
+
+
+def get_user_permission_codenames(user):
+    # Stateless token users already carry their codenames in the access token.
+    claimed = getattr(user, 'custom_permission_codenames', None)
+    if claimed is not None:
+        return claimed
+
+    cache = _get_cache()
+    key = CACHE_KEY.format(user_id=user.pk)
+    codenames = cache.get(key)
+    if codenames is None:
+        codenames = frozenset(user.custom_permissions.values_list('codename', flat=True))
+        cache.set(key, codenames)
+    return codenames
+
+
+async def aget_user_permission_codenames(user):
+    claimed = getattr(user, 'custom_permission_codenames', None)
+    if claimed is not None:
+        return claimed
+
+    cache = _get_cache()
+    key = CACHE_KEY.format(user_id=user.pk)
+    codenames = await cache.aget(key)
+    if codenames is None:
+        codenames = frozenset([
+            codename async for codename in user.custom_permissions.values_list('codename', flat=True)
+        ])
+        await cache.aset(key, codenames)
+    return codenames
+
+
+def user_has_custom_permission(user, codename):
+    return codename in get_user_permission_codenames(user)
+
+
+async def auser_has_custom_permission(user, codename):
+    return codename in await aget_user_permission_codenames(user)
+
+
+def invalidate_user_permissions(*user_ids):
+    if user_ids:
+        _get_cache().delete_many([CACHE_KEY.format(user_id=user_id) for user_id in user_ids])
@@ -0,0 +1,29 @@
+from django.db.models import F
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from .models import User
+from .permission_cache import invalidate_user_permissions
+
+
+def _permissions_changed(*user_ids):
+    if user_ids:
+        User.objects.filter(pk__in=user_ids).update(permissions_version=F('permissions_version') + 1)
+        invalidate_user_permissions(*user_ids)
+
+
+@receiver(m2m_changed, sender=User.custom_permissions.through)
+def custom_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            _permissions_changed(instance.pk)
+        return
+
+    # Changed from the CustomPermission side: pk_set holds user ids, except on
+    # clear, where the affected users have to be captured before the delete.
+    if action == 'pre_clear':
+        instance._cleared_user_ids = list(instance.users.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        _permissions_changed(*getattr(instance, '_cleared_user_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        _permissions_changed(*pk_set)
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .permission_cache import get_user_permission_codenames
+
+EMAIL_CLAIM = 'email'
+PERMISSIONS_CLAIM = 'custom_permissions'
+PERMISSIONS_VERSION_CLAIM = 'permissions_version'
+
+
+def add_user_claims(token, user):
+    token[EMAIL_CLAIM] = user.email
+    token[PERMISSIONS_CLAIM] = sorted(get_user_permission_codenames(user))
+    token[PERMISSIONS_VERSION_CLAIM] = user.permissions_version
+    return token
+
+
+def refresh_access_token(refresh_token):
+    refresh = RefreshToken(refresh_token)
+    User = get_user_model()
+    try:
+        user = User.objects.only('id', 'email', 'is_active', 'permissions_version').get(
+            pk=refresh[api_settings.USER_ID_CLAIM]
+        )
+    except (KeyError, User.DoesNotExist):
+        raise InvalidToken('Token contained no recognizable user identification')
+    if not user.is_active:
+        raise InvalidToken('User is inactive')
+
+    access = refresh.access_token
+    # Claims copied from the refresh token are only trusted while the user's
+    # permissions have not changed since it was issued.
+    if refresh.get(PERMISSIONS_VERSION_CLAIM) != user.permissions_version:
+        add_user_claims(access, user)
+    return access
@@ -9,10 +9,19 @@ from rest_framework import permissions
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
 from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, BasePermission
 from django.shortcuts import get_object_or_404
+from django.conf import settings
+from task_manager_josh.db_router import ReplicaReadsMixin
+from task_manager_josh.pagination import get_page_size, paginate_keyset, pagination_requested
+from task_manager_josh.streaming import stream_envelope, streaming_requested
 from users.models import CustomPermission
+from users.permission_cache import invalidate_user_permissions
+from users.tokens import add_user_claims, refresh_access_token
 
 from .serializers import UserSignupSerializer
 
@@ -20,7 +29,7 @@ User = get_user_model()
 
 def get_tokens_for_user(user):
     serializer = UserSignupSerializer(user)
-    refresh = RefreshToken.for_user(user)
+    refresh = add_user_claims(RefreshToken.for_user(user), user)
     return {
         "user": {**serializer.data},
         "refresh": str(refresh),
@@ -47,12 +56,12 @@ class AccessTokenView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         else:
             try:
-                refresh = RefreshToken(refresh_token)
+                access_token = refresh_access_token(refresh_token)
                 return Response({
                     "success":True,
                     "message":"Access Token Generated successfully",
                     "data":{
-                        "access_token":str(refresh.access_token)
+                        "access_token":str(access_token)
                     }
                 },status=status.HTTP_200_OK)
             except Exception as e:
@@ -83,31 +92,91 @@ class SignUpView(APIView):
                 "data":None
             },status=status.HTTP_400_BAD_REQUEST)
         
-class FetchUsers(APIView):
+USER_LIST_COLUMNS = (
+    'id', 'email', 'name', 'mobile', 'my_field', 'first_name', 'last_name',
+    'is_active', 'is_staff', 'is_superuser', 'last_login', 'date_joined',
+)
+# response field -> (prefetched relation, related model, attribute rendered)
+USER_LIST_RELATIONS = {
+    'groups': ('groups', Group, 'name'),
+    'user_permissions': ('user_permissions', Permission, 'codename'),
+    'custom_permissions': ('custom_permissions', CustomPermission, 'codename'),
+}
+
+def user_list(request):
+    """
+    Builds the FetchUsers queryset for ``?fields=`` and returns it with the
+    function rendering one user; raises ValidationError for unknown fields.
+    """
+    fields = request.query_params.get('fields')
+    if fields:
+        fields = fields.split(',')
+        invalid = [f for f in fields if f not in USER_LIST_COLUMNS and f not in USER_LIST_RELATIONS]
+        if invalid:
+            raise ValidationError(f"Invalid fields: {', '.join(invalid)}")
+    else:
+        fields = [*USER_LIST_COLUMNS, *USER_LIST_RELATIONS]
+
+    # Only the requested columns are loaded and each relation is fetched
+    # in one extra query for the whole page, not one per user.
+    columns = [f for f in fields if f in USER_LIST_COLUMNS]
+    relations = [f for f in fields if f in USER_LIST_RELATIONS]
+    users = User.objects.exclude(id=request.user.id).only('id', *columns).prefetch_related(*[
+        Prefetch(USER_LIST_RELATIONS[f][0], queryset=USER_LIST_RELATIONS[f][1].objects.only('id', USER_LIST_RELATIONS[f][2]))
+        for f in relations
+    ])
+
+    def user_data_for(user):
+        data = {f: getattr(user, f) for f in columns}
+        for f in relations:
+            relation, _, attr = USER_LIST_RELATIONS[f]
+            data[f] = [getattr(obj, attr) for obj in getattr(user, relation).all()]
+        return data
+
+    return users, user_data_for
+
+class FetchUsers(ReplicaReadsMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
     def get(self, request):
-        users = User.objects.all()
-        user_data = [{
-            "id": user.id,
-            "email": user.email,
-            "name": user.name,
-            "mobile": user.mobile,
-            "my_field": user.my_field,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "is_active": user.is_active,
-            "is_staff": user.is_staff,
-            "is_superuser": user.is_superuser,
-            "last_login": user.last_login,
-            "date_joined": user.date_joined,
-            "groups": [group.name for group in user.groups.all()],
-            "user_permissions": [perm.codename for perm in user.user_permissions.all()]
-        } for user in users if user.id != request.user.id]
+        try:
+            users, user_data_for = user_list(request)
+        except ValidationError as e:
+            return Response({
+                "success": False,
+                "message": e.detail[0],
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if streaming_requested(request):
+            return stream_envelope({
+                "success": True,
+                "message": "Users Fetched SuccessFully"
+            }, map(user_data_for, users.order_by('id').iterator(chunk_size=settings.STREAMING_CHUNK_SIZE)))
+
+        next_cursor = None
+        try:
+            if pagination_requested(request):
+                users, next_cursor = paginate_keyset(
+                    users, ('id',),
+                    cursor=request.query_params.get('cursor'),
+                    page_size=get_page_size(request),
+                )
+            else:
+                users = users.order_by('id')
+        except ValidationError as e:
+            return Response({
+                "success": False,
+                "message": e.detail[0],
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        user_data = [user_data_for(user) for user in users]
         if (user_data.__len__() >0):
             return Response({
                 "success": True,
                 "message": "Users Fetched SuccessFully",
-                "data": [*user_data]
+                "data": [*user_data],
+                "next": next_cursor
             })
         else:
             return Response({
@@ -188,6 +257,7 @@ class AddPermissionToUser(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         user.custom_permissions.add(permission)
+        invalidate_user_permissions(user.id)
         return Response({
             "success": True,
             "status": 200,
@@ -225,6 +295,7 @@ class RemovePermissionFromUser(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         user.custom_permissions.remove(permission)
+        invalidate_user_permissions(user.id)
         return Response({
             "success": True,
             "status": 200,